@@ -18,4 +18,7 @@ export class CartItem {
 
   @Column({ type: 'int' })
   unitPrice: number;
+
+  @Column({ type: 'varchar', length: 200, nullable: true })
+  productName: string | null;
 }
@@ -105,6 +105,7 @@ export class CartService {
         product,
         quantity: addToCartDto.quantity,
         unitPrice: product.price,
+        productName: product.name,
       });
       await this.cartItemsRepository.save(newItem);
       cart.items.push(newItem);
@@ -60,6 +60,7 @@ export class OrdersService {
       orderItem.product = product;
       orderItem.quantity = item.quantity;
       orderItem.unitPrice = product.price;
+      orderItem.productName = product.name;
       items.push(orderItem);
     }
 
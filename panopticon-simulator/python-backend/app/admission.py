@@ -0,0 +1,263 @@
+"""Adaptive admission control.
+
+Caps the number of in-flight requests at ``max_limit`` and lowers the cap
+only once latency degrades against its long-term average, shedding the
+excess with a 503 + ``Retry-After`` after at most a short wait instead of
+letting requests queue in the threadpool and the connection pool.
+``/health`` and the ``/debug`` endpoints bypass the limiter, and while the
+limit is lowered checkout keeps a reserved share of it that browsing
+traffic cannot use.
+"""
+from __future__ import annotations
+
+import asyncio
+import json
+import math
+import time
+from collections import deque
+from enum import IntEnum
+from typing import Deque, Dict, List, Optional, Tuple
+
+from .config import get_settings
+
+
+class Priority(IntEnum):
+    NORMAL = 0
+    HIGH = 1
+    CRITICAL = 2
+
+
+def classify(method: str, path: str) -> Priority:
+    if path == "/health" or path.startswith("/debug/"):
+        return Priority.CRITICAL
+    if method == "POST" and path.rstrip("/") == "/orders":
+        return Priority.HIGH
+    return Priority.NORMAL
+
+
+class AdaptiveLimiter:
+    """Gradient concurrency limit driven by latency relative to a baseline.
+
+    Latencies are averaged over short windows, separately per priority since
+    a checkout legitimately takes longer than a product listing. A class's
+    baseline is an exponential average of its window averages over roughly
+    ``baseline_window`` seconds, so steady load and a uniformly slow database
+    move the baseline instead of shrinking the limit. Each window computes
+    ``gradient = clamp(tolerance * expected / observed, 0.5, 1)``, where
+    ``expected`` is the window's latency had every request taken its class
+    baseline (a running average over its first windows). The limit starts at ``max_limit`` and stays there while the
+    gradient is 1; below that it moves towards ``min(limit, peak) *
+    gradient``, and it grows back by ``sqrt(limit)`` per window once latency
+    recovers.
+
+    Requests that find the limit full wait up to ``queue_timeout_ms`` for a
+    slot, in a queue bounded by the limit, so the bursts of completions that
+    request coalescing produces do not turn into bursts of 503s. Freed slots
+    go to higher priorities first. Not thread-safe: it is only touched from
+    the event loop.
+    """
+
+    def __init__(
+        self,
+        min_limit: int = 4,
+        max_limit: int = 200,
+        tolerance: float = 2.0,
+        smoothing: float = 0.2,
+        window_ms: float = 100.0,
+        min_window_samples: int = 5,
+        baseline_window: float = 30.0,
+        reserve_ratio: float = 0.2,
+        queue_timeout_ms: float = 100.0,
+    ) -> None:
+        self.limit = float(max_limit)
+        self.min_limit = min_limit
+        self.max_limit = max_limit
+        self.tolerance = tolerance
+        self.smoothing = smoothing
+        self.window = window_ms / 1000
+        self.min_window_samples = min_window_samples
+        self.baseline_window = baseline_window
+        self.reserve_ratio = reserve_ratio
+        self.queue_timeout = queue_timeout_ms / 1000
+        self.in_flight = 0
+        self.admitted = 0
+        self.queued = 0
+        self.rejected: Dict[str, int] = {priority.name.lower(): 0 for priority in Priority}
+
+        self._window_start = time.monotonic()
+        self._window: Dict[Priority, List[float]] = {}  # priority -> [total latency, count]
+        self._window_peak = 0
+        self._last_gradient: Optional[float] = None
+        self._baselines: Dict[Priority, List[float]] = {}  # priority -> [average, windows seen]
+        self._waiters: Deque[Tuple[Priority, asyncio.Future]] = deque()
+
+    def baseline_ms(self, priority: Priority) -> Optional[float]:
+        baseline = self._baselines.get(priority)
+        return baseline[0] if baseline else None
+
+    def _has_capacity(self, priority: Priority) -> bool:
+        capacity = self.limit
+        if priority < Priority.HIGH and self.limit < self.max_limit:
+            capacity *= 1 - self.reserve_ratio
+        return self.in_flight < max(1, int(capacity))
+
+    def _admit(self) -> None:
+        self.in_flight += 1
+        self.admitted += 1
+        self._window_peak = max(self._window_peak, self.in_flight)
+
+    def _wake(self) -> None:
+        for waiter in sorted(self._waiters, key=lambda waiter: -waiter[0]):
+            priority, future = waiter
+            if self._has_capacity(priority):
+                self._waiters.remove(waiter)
+                self._admit()
+                future.set_result(None)
+
+    async def acquire(self, priority: Priority) -> bool:
+        if not self._waiters and self._has_capacity(priority):
+            self._admit()
+            return True
+        if self.queue_timeout <= 0 or len(self._waiters) >= int(self.limit):
+            self.rejected[priority.name.lower()] += 1
+            return False
+
+        future = asyncio.get_running_loop().create_future()
+        waiter = (priority, future)
+        self._waiters.append(waiter)
+        self.queued += 1
+        try:
+            await asyncio.wait_for(asyncio.shield(future), self.queue_timeout)
+        except asyncio.TimeoutError:
+            pass
+        except asyncio.CancelledError:
+            if future.done():
+                # The slot was handed over just as the client went away.
+                self.in_flight -= 1
+                self._wake()
+            else:
+                self._waiters.remove(waiter)
+                future.cancel()
+            raise
+        # A slot handed over in the same loop iteration as the timeout still counts.
+        if future.done():
+            return True
+        self._waiters.remove(waiter)
+        future.cancel()
+        self.rejected[priority.name.lower()] += 1
+        return False
+
+    def release(self, priority: Priority, latency_ms: float) -> None:
+        self.in_flight -= 1
+        sample = self._window.setdefault(priority, [0.0, 0])
+        sample[0] += latency_ms
+        sample[1] += 1
+        now = time.monotonic()
+        if now - self._window_start >= self.window:
+            if sum(count for _, count in self._window.values()) >= self.min_window_samples:
+                self._update(now)
+        self._wake()
+
+    def _update(self, now: float) -> None:
+        decay = min(1.0, (now - self._window_start) / self.baseline_window)
+        expected = observed = 0.0
+        for priority, (total, count) in self._window.items():
+            baseline = self._baselines.setdefault(priority, [total / count, 0])
+            expected += baseline[0] * count
+            observed += total
+            # A plain running average until there is enough history, so the first
+            # windows of a cold start do not pin the baseline.
+            baseline[1] += 1
+            baseline[0] += (total / count - baseline[0]) * max(decay, 1 / baseline[1])
+
+        gradient = max(0.5, min(1.0, self.tolerance * expected / observed)) if observed else 1.0
+        if gradient < 1.0:
+            target = min(self.limit, self._window_peak) * gradient
+        else:
+            target = self.limit + math.sqrt(self.limit)
+        limit = self.limit * (1 - self.smoothing) + target * self.smoothing
+        self.limit = max(self.min_limit, min(self.max_limit, limit))
+
+        self._last_gradient = gradient
+        self._window_start = now
+        self._window = {}
+        self._window_peak = self.in_flight
+
+    def stats(self) -> Dict[str, object]:
+        return {
+            "limit": round(self.limit, 2),
+            "in_flight": self.in_flight,
+            "gradient": round(self._last_gradient, 3) if self._last_gradient is not None else None,
+            "baseline_ms": {
+                priority.name.lower(): round(self.baseline_ms(priority), 2) for priority in sorted(self._baselines)
+            },
+            "queue": len(self._waiters),
+            "admitted": self.admitted,
+            "queued": self.queued,
+            "rejected": dict(self.rejected),
+        }
+
+
+class AdmissionControlMiddleware:
+    """ASGI middleware that admits requests through an :class:`AdaptiveLimiter`."""
+
+    def __init__(self, app, limiter: AdaptiveLimiter, retry_after: int = 1) -> None:
+        self.app = app
+        self.limiter = limiter
+        self.retry_after = retry_after
+
+    async def __call__(self, scope, receive, send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        priority = classify(scope["method"], scope["path"])
+        if priority is Priority.CRITICAL:
+            await self.app(scope, receive, send)
+            return
+        if not await self.limiter.acquire(priority):
+            await self._reject(send)
+            return
+
+        start = time.perf_counter()
+        released = False
+
+        def release() -> None:
+            nonlocal released
+            if not released:
+                released = True
+                self.limiter.release(priority, (time.perf_counter() - start) * 1000)
+
+        async def send_and_release(message) -> None:
+            await send(message)
+            if message["type"] == "http.response.body" and not message.get("more_body", False):
+                # A keep-alive client sends its next request now, before span and log teardown.
+                release()
+
+        try:
+            await self.app(scope, receive, send_and_release)
+        finally:
+            release()
+
+    async def _reject(self, send) -> None:
+        body = json.dumps({"statusCode": 503, "message": "Server overloaded, retry later"}).encode()
+        await send(
+            {
+                "type": "http.response.start",
+                "status": 503,
+                "headers": [
+                    (b"content-type", b"application/json"),
+                    (b"content-length", str(len(body)).encode()),
+                    (b"retry-after", str(self.retry_after).encode()),
+                ],
+            }
+        )
+        await send({"type": "http.response.body", "body": body})
+
+
+settings = get_settings()
+limiter = AdaptiveLimiter(
+    min_limit=settings.admission_min_limit,
+    max_limit=settings.admission_max_limit,
+    tolerance=settings.admission_latency_tolerance,
+    queue_timeout_ms=settings.admission_queue_timeout_ms,
+)
@@ -0,0 +1,128 @@
+"""Single-flight coalescing of identical concurrent reads.
+
+The first caller for a key (the leader) runs the load; callers arriving while
+it is in flight wait for the same result or exception instead of running
+their own. Flights are shared across threadpool handlers and asyncio
+handlers through a ``concurrent.futures.Future``.
+"""
+from __future__ import annotations
+
+import asyncio
+import threading
+import time
+from concurrent.futures import CancelledError as FutureCancelledError, Future, TimeoutError as FutureTimeoutError
+from typing import Any, Awaitable, Callable, Dict, Hashable, Tuple, TypeVar
+
+from .config import get_settings
+
+T = TypeVar("T")
+
+
+class CoalesceTimeout(TimeoutError):
+    """A waiter gave up on a flight led by another caller."""
+
+
+def _consume_result(future: asyncio.Future) -> None:
+    # Waiters may time out before the flight ends; retrieve the outcome so it is not reported as unhandled.
+    if not future.cancelled():
+        future.exception()
+
+
+class _Flight:
+    __slots__ = ("future", "started")
+
+    def __init__(self) -> None:
+        self.future: Future = Future()
+        self.started = time.monotonic()
+
+
+class SingleFlight:
+    """Coalesces concurrent calls that share a key.
+
+    Waiters give up after ``timeout`` seconds with :class:`CoalesceTimeout`; a flight
+    older than ``timeout`` is not joined by new callers, so a stuck load does
+    not hold a key forever. When an async leader is cancelled (its client went
+    away), its waiters retry instead of inheriting the cancellation.
+    """
+
+    def __init__(self, timeout: float = 5.0) -> None:
+        self.timeout = timeout
+        self._lock = threading.Lock()
+        self._flights: Dict[Hashable, _Flight] = {}
+        self.calls = 0
+        self.shared = 0
+
+    def _join(self, key: Hashable) -> Tuple[_Flight, bool]:
+        with self._lock:
+            self.calls += 1
+            flight = self._flights.get(key)
+            if flight is not None and not flight.future.done() and time.monotonic() - flight.started < self.timeout:
+                self.shared += 1
+                return flight, False
+            flight = self._flights[key] = _Flight()
+            return flight, True
+
+    def _finish(self, key: Hashable, flight: _Flight) -> None:
+        with self._lock:
+            if self._flights.get(key) is flight:
+                del self._flights[key]
+
+    def do(self, key: Hashable, fn: Callable[[], T]) -> T:
+        flight, leader = self._join(key)
+        if not leader:
+            try:
+                return flight.future.result(timeout=self.timeout)
+            except FutureTimeoutError as exc:
+                raise CoalesceTimeout(key) from exc
+            except FutureCancelledError:
+                return self.do(key, fn)
+        try:
+            result = fn()
+        except BaseException as exc:
+            flight.future.set_exception(exc)
+            raise
+        else:
+            flight.future.set_result(result)
+            return result
+        finally:
+            self._finish(key, flight)
+
+    async def do_async(self, key: Hashable, fn: Callable[[], Awaitable[T]]) -> T:
+        flight, leader = self._join(key)
+        if not leader:
+            shared = asyncio.wrap_future(flight.future)
+            shared.add_done_callback(_consume_result)
+            try:
+                return await asyncio.wait_for(asyncio.shield(shared), timeout=self.timeout)
+            except asyncio.TimeoutError as exc:
+                raise CoalesceTimeout(key) from exc
+            except asyncio.CancelledError:
+                if not flight.future.cancelled() or asyncio.current_task().cancelling():
+                    raise
+            return await self.do_async(key, fn)
+        try:
+            result = await fn()
+        except asyncio.CancelledError:
+            flight.future.cancel()
+            raise
+        except BaseException as exc:
+            flight.future.set_exception(exc)
+            raise
+        else:
+            flight.future.set_result(result)
+            return result
+        finally:
+            self._finish(key, flight)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "calls": self.calls,
+                "shared": self.shared,
+                "in_flight": len(self._flights),
+                "coalescing_ratio": round(self.shared / self.calls, 4) if self.calls else 0.0,
+            }
+
+
+settings = get_settings()
+read_flights = SingleFlight(timeout=settings.coalesce_timeout_seconds)
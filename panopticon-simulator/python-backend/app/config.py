@@ -13,11 +13,31 @@ class Settings(BaseSettings):
     database_name: str = Field(default="panopticon", alias="DATABASE_NAME")
     database_user: str = Field(default="panopticon", alias="DATABASE_USER")
     database_password: str = Field(default="panopticon", alias="DATABASE_PASSWORD")
+    database_prepare_threshold: int | None = Field(default=None, alias="DATABASE_PREPARE_THRESHOLD")
 
     otlp_endpoint: str = Field(
         default="http://otel-collector.tenant-a.svc.cluster.local:4318",
         alias="OTEL_EXPORTER_OTLP_ENDPOINT",
     )
+    otel_spool_enabled: bool = Field(default=True, alias="OTEL_SPOOL_ENABLED")
+    otel_spool_dir: str = Field(default="/tmp/otel-spool", alias="OTEL_SPOOL_DIR")
+    otel_spool_max_bytes: int = Field(default=64 * 1024 * 1024, alias="OTEL_SPOOL_MAX_BYTES")
+
+    admission_enabled: bool = Field(default=False, alias="ADMISSION_ENABLED")
+    admission_min_limit: int = Field(default=4, alias="ADMISSION_MIN_LIMIT")
+    admission_max_limit: int = Field(default=100, alias="ADMISSION_MAX_LIMIT")
+    admission_latency_tolerance: float = Field(default=2.0, alias="ADMISSION_LATENCY_TOLERANCE")
+    admission_queue_timeout_ms: float = Field(default=100.0, alias="ADMISSION_QUEUE_TIMEOUT_MS")
+
+    coalesce_timeout_seconds: float = Field(default=5.0, alias="COALESCE_TIMEOUT_SECONDS")
+
+    user_cache_max_entries: int = Field(default=10000, alias="USER_CACHE_MAX_ENTRIES")
+    user_cache_ttl_seconds: float = Field(default=60.0, alias="USER_CACHE_TTL_SECONDS")
+    user_cache_negative_ttl_seconds: float = Field(default=5.0, alias="USER_CACHE_NEGATIVE_TTL_SECONDS")
+
+    debug_token: str | None = Field(default=None, alias="DEBUG_TOKEN")
+    profile_on_start_seconds: float | None = Field(default=None, alias="PROFILE_ON_START_SECONDS")
+    profile_output_path: str = Field(default="/tmp/profile.collapsed", alias="PROFILE_OUTPUT_PATH")
 
     seed_demo_data: bool = Field(default=True, alias="SEED_DEMO_DATA")
 
@@ -1,6 +1,6 @@
 from contextlib import contextmanager
 
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, make_url
 from sqlalchemy.orm import declarative_base, sessionmaker, Session
 
 from .config import get_settings
@@ -9,10 +9,16 @@ from .config import get_settings
 settings = get_settings()
 DATABASE_URL = settings.build_database_url()
 
+connect_args = {}
+if settings.database_prepare_threshold is not None and make_url(DATABASE_URL).get_driver_name() == "psycopg":
+    # psycopg 3 only: server-side prepare a statement after it has run this many times.
+    connect_args["prepare_threshold"] = settings.database_prepare_threshold
+
 engine = create_engine(
     DATABASE_URL,
     pool_pre_ping=True,
     future=True,
+    connect_args=connect_args,
 )
 
 SessionLocal = sessionmaker(bind=engine, autocommit=False, autoflush=False, expire_on_commit=False)
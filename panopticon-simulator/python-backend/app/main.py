@@ -3,10 +3,14 @@ from fastapi import FastAPI, Request
 from fastapi.middleware.cors import CORSMiddleware
 from opentelemetry import trace
 
+from . import admission
+from .admission import AdmissionControlMiddleware
 from .config import get_settings
 from .database import Base, engine, session_scope
 from .logger import configure_logging, get_logger
-from .routers import cart, orders, products, users
+from .migrations import run_data_migrations_in_background, run_migrations
+from .profiler import profile_on_start
+from .routers import cart, debug, orders, products, users
 from .seed import seed_data
 from .telemetry import setup_telemetry
 
@@ -14,21 +18,15 @@ configure_logging()
 settings = get_settings()
 
 Base.metadata.create_all(bind=engine)
+run_migrations(engine)
 
 app = FastAPI(title="Ecommerce Python Backend", version="1.0.0", redirect_slashes=False)
 
-app.add_middleware(
-    CORSMiddleware,
-    allow_origins=["*"],
-    allow_credentials=True,
-    allow_methods=["*"],
-    allow_headers=["*"],
-)
-
 app.include_router(products.router)
 app.include_router(users.router)
 app.include_router(orders.router)
 app.include_router(cart.router)
+app.include_router(debug.router)
 
 logger = get_logger("app")
 
@@ -54,15 +52,32 @@ async def log_requests(request: Request, call_next):
 # Setup telemetry AFTER middleware registration
 setup_telemetry(app, engine)
 
+# Registered after telemetry so they wrap it: shed requests skip the span and the
+# request log, and 503s still carry CORS headers for the browser frontend.
+if settings.admission_enabled:
+    app.add_middleware(AdmissionControlMiddleware, limiter=admission.limiter)
+
+app.add_middleware(
+    CORSMiddleware,
+    allow_origins=["*"],
+    allow_credentials=True,
+    allow_methods=["*"],
+    allow_headers=["*"],
+)
+
 
 @app.on_event("startup")
 def startup_event():
     if settings.seed_demo_data:
         with session_scope() as session:
             seed_data(session)
+    run_data_migrations_in_background(engine)
+    if settings.profile_on_start_seconds:
+        profile_on_start(app, settings.profile_on_start_seconds, settings.profile_output_path)
     logger.info("Python backend started", service=settings.app_name)
 
 
 @app.get("/health")
-def health():
+async def health():
+    # Runs on the event loop so liveness probes are answered even when the threadpool is saturated.
     return {"status": "ok", "service": settings.app_name}
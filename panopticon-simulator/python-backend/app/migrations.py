@@ -0,0 +1,149 @@
+"""Schema migrations applied at startup after ``create_all``.
+
+Schema changes are idempotent and run on every boot. Data migrations are
+one-off steps recorded in ``schema_migrations``; startup runs pending ones in
+a background thread, and they can be run (or re-run with ``--force``) by hand:
+
+    python -m app.migrations [--batch-size 5000] [--force]
+"""
+import argparse
+import threading
+from datetime import datetime
+
+from sqlalchemy import exists, inspect, select, text, true, update
+from sqlalchemy.engine import Engine
+from sqlalchemy.exc import IntegrityError
+
+from .logger import get_logger
+from .models import CartItem, OrderItem, Product
+
+logger = get_logger("migrations")
+
+BACKFILL_PRODUCT_NAMES = "backfill_product_names"
+
+
+def add_product_name_snapshot(engine: Engine) -> None:
+    """Add ``productName`` to order/cart items.
+
+    Only issues the ``ALTER TABLE`` when the column is missing, since it takes
+    an ACCESS EXCLUSIVE lock even when there is nothing to add. On Postgres a
+    short ``lock_timeout`` keeps a boot from stalling all traffic to the table
+    behind a long-running transaction; the next start retries.
+    """
+    with engine.begin() as conn:
+        for model in (OrderItem, CartItem):
+            table = model.__table__
+            if "productName" in {column["name"] for column in inspect(conn).get_columns(table.name)}:
+                continue
+            if engine.dialect.name == "postgresql":
+                conn.execute(text("SET LOCAL lock_timeout = '5s'"))
+                # Other replicas and TypeORM's synchronize may add the column concurrently.
+                conn.execute(text(f'ALTER TABLE {table.name} ADD COLUMN IF NOT EXISTS "productName" VARCHAR(200)'))
+            else:
+                conn.execute(text(f'ALTER TABLE {table.name} ADD COLUMN "productName" VARCHAR(200)'))
+            logger.info("added productName column", table=table.name)
+
+
+def create_migrations_table(engine: Engine) -> None:
+    with engine.begin() as conn:
+        conn.execute(
+            text(
+                "CREATE TABLE IF NOT EXISTS schema_migrations "
+                '(name VARCHAR(100) PRIMARY KEY, "appliedAt" TIMESTAMP NOT NULL)'
+            )
+        )
+
+
+def is_applied(engine: Engine, name: str) -> bool:
+    with engine.connect() as conn:
+        applied = conn.execute(text("SELECT 1 FROM schema_migrations WHERE name = :name"), {"name": name})
+        return applied.first() is not None
+
+
+def mark_applied(engine: Engine, name: str) -> None:
+    try:
+        with engine.begin() as conn:
+            conn.execute(
+                text('INSERT INTO schema_migrations (name, "appliedAt") VALUES (:name, :applied_at)'),
+                {"name": name, "applied_at": datetime.utcnow()},
+            )
+    except IntegrityError:
+        pass  # Another replica finished it first.
+
+
+def backfill_product_names(engine: Engine, batch_size: int = 5000) -> None:
+    """Copy ``products.name`` into item rows that have no snapshot yet.
+
+    Walks each table in primary key order, one short transaction per batch, so
+    the backfill never holds locks on the whole table. Rows whose product has
+    been deleted are skipped and stay ``NULL``.
+    """
+    for model in (OrderItem, CartItem):
+        table = model.__table__
+        product_name = select(Product.name).where(Product.id == table.c.productId).scalar_subquery()
+        last_id, updated = None, 0
+        while True:
+            # Item ids are UUIDs on Postgres, so the first batch has no lower bound rather than "".
+            after = table.c.id > last_id if last_id is not None else true()
+            with engine.begin() as conn:
+                ids = conn.execute(
+                    select(table.c.id).where(after).order_by(table.c.id).limit(batch_size)
+                ).scalars().all()
+                if not ids:
+                    break
+                result = conn.execute(
+                    update(table)
+                    .where(
+                        after,
+                        table.c.id <= ids[-1],
+                        table.c.productName.is_(None),
+                        exists().where(Product.id == table.c.productId),
+                    )
+                    .values(productName=product_name)
+                )
+            updated += result.rowcount
+            last_id = ids[-1]
+        logger.info("backfilled productName", table=table.name, rows=updated)
+
+
+def run_data_migrations(engine: Engine, batch_size: int = 5000, force: bool = False) -> None:
+    if not force and is_applied(engine, BACKFILL_PRODUCT_NAMES):
+        return
+    backfill_product_names(engine, batch_size)
+    mark_applied(engine, BACKFILL_PRODUCT_NAMES)
+
+
+def run_data_migrations_in_background(engine: Engine) -> None:
+    if is_applied(engine, BACKFILL_PRODUCT_NAMES):
+        return
+
+    def run() -> None:
+        try:
+            run_data_migrations(engine)
+        except Exception as exc:
+            logger.warning("data migration failed; it will be retried on the next start", error=repr(exc))
+
+    threading.Thread(target=run, name="data-migrations", daemon=True).start()
+
+
+def run_migrations(engine: Engine) -> None:
+    add_product_name_snapshot(engine)
+    create_migrations_table(engine)
+
+
+def main() -> None:
+    from .database import engine
+
+    parser = argparse.ArgumentParser(description="Apply schema and data migrations.")
+    parser.add_argument("--batch-size", type=int, default=5000, help="rows per backfill transaction")
+    parser.add_argument("--force", action="store_true", help="re-run data migrations that are already recorded")
+    args = parser.parse_args()
+    if args.batch_size <= 0:
+        parser.error("--batch-size must be greater than 0")
+
+    run_migrations(engine)
+    run_data_migrations(engine, args.batch_size, args.force)
+
+
+if __name__ == "__main__":
+    main()
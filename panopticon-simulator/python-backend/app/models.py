@@ -38,6 +38,19 @@ class TimestampMixin:
     )
 
 
+class ProductNameMixin:
+    @property
+    def display_product_name(self) -> str:
+        """The ``productName`` snapshot, or the product's current name when there is none yet.
+
+        Rows the backfill has not reached, or written by an older replica during a
+        rolling deploy, are ``NULL``; only those lazy-load the product.
+        """
+        if self.product_name is not None:
+            return self.product_name
+        return self.product.name if self.product is not None else ""
+
+
 class User(Base):
     __tablename__ = "users"
 
@@ -88,7 +101,7 @@ class Order(Base, TimestampMixin):
     )
 
 
-class OrderItem(Base):
+class OrderItem(Base, ProductNameMixin):
     __tablename__ = "order_items"
 
     id: Mapped[str] = mapped_column(UUID(as_uuid=False), primary_key=True, default=lambda: str(uuid4()))
@@ -96,6 +109,8 @@ class OrderItem(Base):
     product_id: Mapped[str] = mapped_column(UUID(as_uuid=False), ForeignKey("products.id"), name="productId")
     quantity: Mapped[int] = mapped_column(Integer, nullable=False)
     unit_price: Mapped[int] = mapped_column(Integer, nullable=False, name="unitPrice")
+    # Snapshot taken at write time so reads don't join products and survive renames/deletes.
+    product_name: Mapped[str | None] = mapped_column(String(200), nullable=True, name="productName")
 
     order: Mapped[Order] = relationship(back_populates="items")
     product: Mapped[Product] = relationship(back_populates="order_items")
@@ -114,7 +129,7 @@ class Cart(Base, TimestampMixin):
         cascade="all, delete-orphan",
     )
 
-class CartItem(Base):
+class CartItem(Base, ProductNameMixin):
     __tablename__ = "cart_items"
 
     id: Mapped[str] = mapped_column(UUID(as_uuid=False), primary_key=True, default=lambda: str(uuid4()))
@@ -122,6 +137,7 @@ class CartItem(Base):
     product_id: Mapped[str] = mapped_column(UUID(as_uuid=False), ForeignKey("products.id"), name="productId")
     quantity: Mapped[int] = mapped_column(Integer, nullable=False)
     unit_price: Mapped[int] = mapped_column(Integer, nullable=False, name="unitPrice")
+    product_name: Mapped[str | None] = mapped_column(String(200), nullable=True, name="productName")
 
     cart: Mapped[Cart] = relationship(back_populates="items")
     product: Mapped[Product] = relationship(back_populates="cart_items")
@@ -0,0 +1,157 @@
+"""On-demand statistical sampling profiler.
+
+While a profile is running, a background thread snapshots the stacks of all
+threads with ``sys._current_frames()`` at a fixed interval. Nothing is
+installed when no profile is running, so idle overhead is zero. Samples are
+attributed to a route when a FastAPI endpoint function is on the stack.
+"""
+from __future__ import annotations
+
+import os
+import sys
+import threading
+import time
+from collections import Counter
+from dataclasses import dataclass, field
+from types import CodeType, FrameType
+from typing import Dict, List, Optional, Tuple
+
+from fastapi import FastAPI
+from fastapi.routing import APIRoute
+
+from .logger import get_logger
+
+logger = get_logger("profiler")
+
+# Leaf frames in these modules are threads parked on a lock/selector rather than doing work.
+_IDLE_MODULES = ("threading.py", "selectors.py", "queue.py", "base_events.py")
+_PATH_PREFIXES = sorted({os.path.join(path, "") for path in sys.path if path}, key=len, reverse=True)
+
+_labels: Dict[CodeType, str] = {}
+
+profile_lock = threading.Lock()
+
+
+def _frame_label(code: CodeType) -> str:
+    label = _labels.get(code)
+    if label is not None:
+        return label
+    filename = code.co_filename
+    for prefix in _PATH_PREFIXES:
+        if filename.startswith(prefix):
+            filename = filename[len(prefix):]
+            break
+    label = _labels[code] = f"{code.co_name} ({filename}:{code.co_firstlineno})"
+    return label
+
+
+def route_codes(app: FastAPI) -> Dict[CodeType, str]:
+    """Map endpoint function code objects to ``"METHOD /path"`` labels."""
+    codes: Dict[CodeType, str] = {}
+    for route in app.routes:
+        if isinstance(route, APIRoute):
+            endpoint = getattr(route.endpoint, "__wrapped__", route.endpoint)
+            code = getattr(endpoint, "__code__", None)
+            if code is not None:
+                codes.setdefault(code, f"{','.join(sorted(route.methods))} {route.path}")
+    return codes
+
+
+@dataclass
+class Profile:
+    duration: float
+    interval: float
+    samples: int = 0
+    stacks: Counter = field(default_factory=Counter)
+    routes: Counter = field(default_factory=Counter)
+    route_leaves: Dict[str, Counter] = field(default_factory=dict)
+
+    def collapsed(self) -> str:
+        """Brendan Gregg's collapsed-stack format, one ``frame;frame;... count`` per line."""
+        return "\n".join(f"{';'.join(stack)} {count}" for stack, count in self.stacks.most_common()) + "\n"
+
+    def route_breakdown(self, top: int = 10) -> Dict[str, object]:
+        return {
+            "duration_seconds": round(self.duration, 3),
+            "interval_ms": round(self.interval * 1000, 3),
+            "samples": self.samples,
+            "routes": {
+                route: {
+                    "samples": count,
+                    "share": round(count / self.samples, 4) if self.samples else 0.0,
+                    "top_frames": self.route_leaves[route].most_common(top),
+                }
+                for route, count in self.routes.most_common()
+            },
+        }
+
+
+class SamplingProfiler:
+    def __init__(self, app: FastAPI, interval: float = 0.01, include_idle: bool = False) -> None:
+        self.interval = interval
+        self.include_idle = include_idle
+        self._routes = route_codes(app)
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._profile: Optional[Profile] = None
+        self._started = 0.0
+
+    def start(self) -> None:
+        self._profile = Profile(duration=0.0, interval=self.interval)
+        self._started = time.perf_counter()
+        self._thread = threading.Thread(target=self._run, name="sampling-profiler", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> Profile:
+        self._stop.set()
+        self._thread.join()
+        self._profile.duration = time.perf_counter() - self._started
+        return self._profile
+
+    def run(self, seconds: float) -> Profile:
+        self.start()
+        self._stop.wait(seconds)
+        return self.stop()
+
+    def _run(self) -> None:
+        own_ident = threading.get_ident()
+        names = {}
+        while not self._stop.wait(self.interval):
+            if len(names) != threading.active_count():
+                names = {thread.ident: thread.name for thread in threading.enumerate()}
+            for ident, frame in sys._current_frames().items():
+                if ident != own_ident:
+                    self._record(names.get(ident, str(ident)), frame)
+
+    def _record(self, thread_name: str, frame: FrameType) -> None:
+        leaf = frame.f_code
+        if not self.include_idle and leaf.co_filename.endswith(_IDLE_MODULES):
+            return
+        codes: List[CodeType] = []
+        route = None
+        while frame is not None:
+            codes.append(frame.f_code)
+            if route is None:
+                route = self._routes.get(frame.f_code)
+            frame = frame.f_back
+        stack: Tuple[str, ...] = (route or thread_name, *(_frame_label(code) for code in reversed(codes)))
+
+        profile = self._profile
+        profile.samples += 1
+        profile.stacks[stack] += 1
+        if route is not None:
+            profile.routes[route] += 1
+            profile.route_leaves.setdefault(route, Counter())[_frame_label(leaf)] += 1
+
+
+def profile_on_start(app: FastAPI, seconds: float, output_path: str) -> None:
+    """Profile the first ``seconds`` after startup in the background and write collapsed stacks."""
+
+    def run() -> None:
+        with profile_lock:
+            profile = SamplingProfiler(app).run(seconds)
+        with open(output_path, "w") as output:
+            output.write(profile.collapsed())
+        logger.info("startup profile written", path=output_path, **profile.route_breakdown(top=3))
+
+    threading.Thread(target=run, name="startup-profile", daemon=True).start()
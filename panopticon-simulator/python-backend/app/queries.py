@@ -0,0 +1,49 @@
+"""Pre-built statements for the hot lookups shared by the routers.
+
+The statements are constructed once at import time with bound parameters,
+so every request reuses the same statement object and hits SQLAlchemy's
+compiled cache instead of rebuilding a legacy ``Query`` each time.
+"""
+from __future__ import annotations
+
+from typing import Dict, Iterable, Optional
+
+from sqlalchemy import bindparam, select
+from sqlalchemy.orm import Session, joinedload
+
+from .models import Cart, Product, User
+
+PRODUCT_BY_ID = select(Product).where(Product.id == bindparam("product_id"))
+PRODUCTS_BY_IDS = select(Product).where(Product.id.in_(bindparam("product_ids", expanding=True)))
+USER_BY_ID = select(User).where(User.id == bindparam("user_id"))
+USER_BY_EMAIL = select(User).where(User.email == bindparam("email"))
+CART_BY_USER = (
+    select(Cart)
+    .options(joinedload(Cart.items))
+    .where(Cart.user_id == bindparam("user_id"))
+    .limit(1)
+)
+
+
+def get_product(db: Session, product_id: str) -> Optional[Product]:
+    return db.execute(PRODUCT_BY_ID, {"product_id": product_id}).scalars().first()
+
+
+def get_products(db: Session, product_ids: Iterable[str]) -> Dict[str, Product]:
+    product_ids = list(product_ids)
+    if not product_ids:
+        return {}
+    products = db.execute(PRODUCTS_BY_IDS, {"product_ids": product_ids}).scalars()
+    return {product.id: product for product in products}
+
+
+def get_user(db: Session, user_id: str) -> Optional[User]:
+    return db.execute(USER_BY_ID, {"user_id": user_id}).scalars().first()
+
+
+def get_user_by_email(db: Session, email: str) -> Optional[User]:
+    return db.execute(USER_BY_EMAIL, {"email": email}).scalars().first()
+
+
+def get_cart_for_user(db: Session, user_id: str) -> Optional[Cart]:
+    return db.execute(CART_BY_USER, {"user_id": user_id}).unique().scalars().first()
@@ -1,27 +1,24 @@
 from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session, joinedload
+from sqlalchemy.orm import Session
 
+from .. import queries
 from ..database import get_db
 from ..logger import get_logger
-from ..models import Cart, CartItem, Product, User
-from ..schemas import AddToCartRequest, CartRead, CartItemRead, UpdateCartItemRequest
+from ..models import Cart, CartItem
+from ..schemas import AddToCartRequest, BulkUpdateCartRequest, CartRead, CartItemRead, UpdateCartItemRequest
+from ..user_cache import user_cache
 
 router = APIRouter(prefix="/cart", tags=["cart"])
 logger = get_logger("cart")
 
 
 def fetch_cart(db: Session, user_id: str) -> Cart:
-    cart = (
-        db.query(Cart)
-        .options(joinedload(Cart.items).joinedload(CartItem.product))
-        .filter(Cart.user_id == user_id)
-        .first()
-    )
+    cart = queries.get_cart_for_user(db, user_id)
     if not cart:
-        user = db.query(User).filter(User.id == user_id).first()
+        user = user_cache.get_user(db, user_id)
         if not user:
             raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="User not found")
-        cart = Cart(user=user, total_amount=0, items=[])
+        cart = Cart(user_id=user.id, total_amount=0, items=[])
         db.add(cart)
         db.commit()
         db.refresh(cart)
@@ -38,7 +35,7 @@ def serialize_cart(cart: Cart) -> CartRead:
         items=[
             CartItemRead(
                 productId=item.product_id,
-                productName=item.product.name if item.product else "",
+                productName=item.display_product_name,
                 price=item.unit_price,
                 quantity=item.quantity,
             )
@@ -60,7 +57,7 @@ def get_cart(user_id: str, db: Session = Depends(get_db)):
 @router.post("/items", response_model=CartRead, status_code=status.HTTP_201_CREATED)
 def add_item(payload: AddToCartRequest, db: Session = Depends(get_db)):
     cart = fetch_cart(db, payload.userId)
-    product = db.query(Product).filter(Product.id == payload.productId).first()
+    product = queries.get_product(db, payload.productId)
     if not product:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Product not found")
     if product.stock < payload.quantity:
@@ -69,7 +66,13 @@ def add_item(payload: AddToCartRequest, db: Session = Depends(get_db)):
     if existing:
         existing.quantity += payload.quantity
     else:
-        new_item = CartItem(cart=cart, product=product, quantity=payload.quantity, unit_price=product.price)
+        new_item = CartItem(
+            cart=cart,
+            product=product,
+            product_name=product.name,
+            quantity=payload.quantity,
+            unit_price=product.price,
+        )
         cart.items.append(new_item)
         db.add(new_item)
     recalc_total(cart)
@@ -89,7 +92,7 @@ def update_item(user_id: str, product_id: str, payload: UpdateCartItemRequest, d
         cart.items.remove(item)
         db.delete(item)
     else:
-        product = db.query(Product).filter(Product.id == product_id).first()
+        product = queries.get_product(db, product_id)
         if not product or product.stock < payload.quantity:
             raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Insufficient stock")
         item.quantity = payload.quantity
@@ -99,6 +102,49 @@ def update_item(user_id: str, product_id: str, payload: UpdateCartItemRequest, d
     return serialize_cart(cart)
 
 
+@router.patch("/{user_id}", response_model=CartRead)
+def bulk_update(user_id: str, payload: BulkUpdateCartRequest, db: Session = Depends(get_db)):
+    cart = fetch_cart(db, user_id)
+    items = {item.product_id: item for item in cart.items}
+    products = queries.get_products(db, {op.productId for op in payload.operations if op.op != "remove"})
+
+    for op in payload.operations:
+        item = items.get(op.productId)
+        if op.op == "remove" or (op.op == "set" and op.quantity <= 0):
+            if not item:
+                raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Product not in cart")
+            cart.items.remove(item)
+            db.delete(item)
+            del items[op.productId]
+            continue
+        product = products.get(op.productId)
+        if not product:
+            raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=f"Product {op.productId} not found")
+        quantity = op.quantity + (item.quantity if item and op.op == "add" else 0)
+        if quantity <= 0:
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Quantity must be positive")
+        if item:
+            item.quantity = quantity
+        else:
+            item = items[op.productId] = CartItem(
+                product=product,
+                product_name=product.name,
+                quantity=quantity,
+                unit_price=product.price,
+            )
+            cart.items.append(item)
+
+    for product_id, item in items.items():
+        product = products.get(product_id)
+        if product and product.stock < item.quantity:
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Insufficient stock")
+    recalc_total(cart)
+    db.commit()
+    db.refresh(cart)
+    logger.info("cart bulk update", user=user_id, operations=len(payload.operations))
+    return serialize_cart(cart)
+
+
 @router.delete("/{user_id}/items/{product_id}", response_model=CartRead)
 def remove_item(user_id: str, product_id: str, db: Session = Depends(get_db)):
     cart = fetch_cart(db, user_id)
@@ -0,0 +1,57 @@
+import asyncio
+import secrets
+
+from fastapi import APIRouter, Depends, Header, HTTPException, Query, Request, status
+from fastapi.responses import PlainTextResponse
+
+from .. import admission, coalesce
+from ..config import get_settings
+from ..profiler import SamplingProfiler, profile_lock
+from ..telemetry import telemetry_stats
+from ..user_cache import user_cache
+
+
+def require_debug_token(x_debug_token: str | None = Header(default=None)) -> None:
+    token = get_settings().debug_token
+    if not token:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Not Found")
+    if not x_debug_token or not secrets.compare_digest(x_debug_token, token):
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Invalid debug token")
+
+
+router = APIRouter(prefix="/debug", tags=["debug"], dependencies=[Depends(require_debug_token)])
+
+
+@router.get("/stats")
+def stats():
+    return {
+        "span_spool": telemetry_stats(),
+        "admission": admission.limiter.stats(),
+        "coalescing": coalesce.read_flights.stats(),
+        "user_cache": user_cache.stats(),
+    }
+
+
+@router.get("/profile")
+async def profile(
+    request: Request,
+    seconds: float = Query(default=10.0, gt=0, le=60),
+    interval_ms: float = Query(default=10.0, ge=1, le=1000),
+    format: str = Query(default="collapsed", pattern="^(collapsed|routes)$"),
+    include_idle: bool = Query(default=False),
+):
+    if not profile_lock.acquire(blocking=False):
+        raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail="Profile already running")
+    try:
+        profiler = SamplingProfiler(request.app, interval=interval_ms / 1000, include_idle=include_idle)
+        profiler.start()
+        try:
+            await asyncio.sleep(seconds)
+        finally:
+            # stop() joins the sampler thread; keep that off the event loop.
+            result = await asyncio.to_thread(profiler.stop)
+    finally:
+        profile_lock.release()
+    if format == "routes":
+        return result.route_breakdown()
+    return PlainTextResponse(result.collapsed())
@@ -1,10 +1,12 @@
 from fastapi import APIRouter, Depends, HTTPException, Query, status
 from sqlalchemy.orm import Session, joinedload
 
+from .. import queries
 from ..database import get_db
 from ..logger import get_logger
-from ..models import Order, OrderItem, Product, User
+from ..models import Order, OrderItem
 from ..schemas import OrderCreate, OrderRead
+from ..user_cache import user_cache
 
 router = APIRouter(prefix="/orders", tags=["orders"])
 logger = get_logger("orders")
@@ -22,7 +24,7 @@ def serialize_order(order: Order) -> dict:
             {
                 "id": item.id,
                 "productId": item.product_id,
-                "productName": item.product.name if item.product else "",
+                "productName": item.display_product_name,
                 "quantity": item.quantity,
                 "unitPrice": item.unit_price,
             }
@@ -35,7 +37,7 @@ def serialize_order(order: Order) -> dict:
 def list_orders(userId: str | None = Query(default=None), db: Session = Depends(get_db)):
     query = (
         db.query(Order)
-        .options(joinedload(Order.items).joinedload(OrderItem.product))
+        .options(joinedload(Order.items))
         .order_by(Order.created_at.desc())
     )
     if userId:
@@ -48,7 +50,7 @@ def list_orders(userId: str | None = Query(default=None), db: Session = Depends(
 def get_order(order_id: str, db: Session = Depends(get_db)):
     order = (
         db.query(Order)
-        .options(joinedload(Order.items).joinedload(OrderItem.product))
+        .options(joinedload(Order.items))
         .filter(Order.id == order_id)
         .first()
     )
@@ -59,7 +61,7 @@ def get_order(order_id: str, db: Session = Depends(get_db)):
 
 @router.post("/", response_model=OrderRead, status_code=status.HTTP_201_CREATED)
 def create_order(payload: OrderCreate, db: Session = Depends(get_db)):
-    user = db.query(User).filter(User.id == payload.userId).first()
+    user = user_cache.get_user(db, payload.userId)
     if not user:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="User not found")
 
@@ -69,14 +71,19 @@ def create_order(payload: OrderCreate, db: Session = Depends(get_db)):
     order_items: list[OrderItem] = []
     total = 0
     for item in payload.items:
-        product = db.query(Product).filter(Product.id == item.productId).first()
+        product = queries.get_product(db, item.productId)
         if not product:
             raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=f"Product {item.productId} not found")
-        order_item = OrderItem(product=product, quantity=item.quantity, unit_price=product.price)
+        order_item = OrderItem(
+            product=product,
+            product_name=product.name,
+            quantity=item.quantity,
+            unit_price=product.price,
+        )
         total += order_item.quantity * order_item.unit_price
         order_items.append(order_item)
 
-    order = Order(user=user, items=order_items, total_amount=total, status="pending")
+    order = Order(user_id=user.id, items=order_items, total_amount=total, status="pending")
     db.add(order)
     db.commit()
     db.refresh(order)
@@ -1,6 +1,9 @@
-from fastapi import APIRouter, Depends, HTTPException, Query, status
+from fastapi import APIRouter, Depends, HTTPException, Query, Response, status
+from pydantic import TypeAdapter
 from sqlalchemy.orm import Session
 
+from .. import queries
+from ..coalesce import CoalesceTimeout, read_flights
 from ..database import get_db
 from ..logger import get_logger
 from ..models import Product
@@ -9,26 +12,47 @@ from ..schemas import ProductCreate, ProductRead, ProductUpdate
 router = APIRouter(prefix="/products", tags=["products"])
 logger = get_logger("products")
 
+product_adapter = TypeAdapter(ProductRead)
+product_list_adapter = TypeAdapter(list[ProductRead])
+
+
+def coalesced_response(key: tuple, load) -> Response:
+    try:
+        body = read_flights.do(key, load)
+    except CoalesceTimeout:
+        logger.warning("timed out waiting for a shared read", key=str(key))
+        raise HTTPException(status_code=status.HTTP_504_GATEWAY_TIMEOUT, detail="Timed out waiting for product data")
+    return Response(content=body, media_type="application/json")
+
 
 @router.get("", response_model=list[ProductRead])
 @router.get("/", response_model=list[ProductRead])
 def list_products(category: str | None = Query(default=None), db: Session = Depends(get_db)):
-    query = db.query(Product)
-    if category:
-        logger.info("filtering products", category=category)
-        query = query.filter(Product.category == category)
-    products = query.all()
-    logger.info("listing products", count=len(products))
-    return products
+    def load() -> bytes:
+        query = db.query(Product)
+        if category:
+            logger.info("filtering products", category=category)
+            query = query.filter(Product.category == category)
+        products = query.all()
+        logger.info("listing products", count=len(products))
+        return product_list_adapter.dump_json(
+            product_list_adapter.validate_python(products, from_attributes=True), by_alias=True
+        )
+
+    # Concurrent identical listings share one query and one serialized body.
+    return coalesced_response(("products", category), load)
 
 
 @router.get("/{product_id}", response_model=ProductRead)
 def get_product(product_id: str, db: Session = Depends(get_db)):
-    product = db.query(Product).filter(Product.id == product_id).first()
-    if not product:
-        logger.warning("product not found", product_id=product_id)
-        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Product not found")
-    return product
+    def load() -> bytes:
+        product = queries.get_product(db, product_id)
+        if not product:
+            logger.warning("product not found", product_id=product_id)
+            raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Product not found")
+        return product_adapter.dump_json(product_adapter.validate_python(product, from_attributes=True), by_alias=True)
+
+    return coalesced_response(("product", product_id), load)
 
 
 @router.post("/", response_model=ProductRead, status_code=status.HTTP_201_CREATED)
@@ -43,7 +67,7 @@ def create_product(payload: ProductCreate, db: Session = Depends(get_db)):
 
 @router.put("/{product_id}", response_model=ProductRead)
 def update_product(product_id: str, payload: ProductUpdate, db: Session = Depends(get_db)):
-    product = db.query(Product).filter(Product.id == product_id).first()
+    product = queries.get_product(db, product_id)
     if not product:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Product not found")
     for field, value in payload.model_dump(exclude_unset=True).items():
@@ -56,7 +80,7 @@ def update_product(product_id: str, payload: ProductUpdate, db: Session = Depend
 
 @router.delete("/{product_id}", status_code=status.HTTP_204_NO_CONTENT)
 def delete_product(product_id: str, db: Session = Depends(get_db)):
-    product = db.query(Product).filter(Product.id == product_id).first()
+    product = queries.get_product(db, product_id)
     if not product:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Product not found")
     db.delete(product)
@@ -5,6 +5,7 @@ from ..database import get_db
 from ..logger import get_logger
 from ..models import User
 from ..schemas import UserCreate, UserLoginRequest, UserRead
+from ..user_cache import user_cache
 
 router = APIRouter(prefix="/users", tags=["users"])
 logger = get_logger("users")
@@ -18,7 +19,7 @@ def list_users(db: Session = Depends(get_db)):
 
 @router.get("/{user_id}", response_model=UserRead)
 def get_user(user_id: str, db: Session = Depends(get_db)):
-    user = db.query(User).filter(User.id == user_id).first()
+    user = user_cache.get_user(db, user_id)
     if not user:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="User not found")
     return user
@@ -26,7 +27,7 @@ def get_user(user_id: str, db: Session = Depends(get_db)):
 
 @router.post("/", response_model=UserRead, status_code=status.HTTP_201_CREATED)
 def create_user(payload: UserCreate, db: Session = Depends(get_db)):
-    existing = db.query(User).filter(User.email == payload.email).first()
+    existing = user_cache.get_user_by_email(db, payload.email)
     if existing:
         raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail="User already exists")
     user = User(**payload.model_dump())
@@ -34,12 +35,12 @@ def create_user(payload: UserCreate, db: Session = Depends(get_db)):
     db.commit()
     db.refresh(user)
     logger.info("created user", user_id=user.id)
-    return user
+    return user_cache.store(user)
 
 
 @router.post("/login", response_model=UserRead)
 def login(payload: UserLoginRequest, db: Session = Depends(get_db)):
-    user = db.query(User).filter(User.email == payload.email).first()
+    user = user_cache.get_user_by_email(db, payload.email)
     if user:
         return user
     user = User(email=payload.email, name=payload.name or payload.email.split("@")[0])
@@ -47,4 +48,4 @@ def login(payload: UserLoginRequest, db: Session = Depends(get_db)):
     db.commit()
     db.refresh(user)
     logger.info("created user via login", user_id=user.id)
-    return user
+    return user_cache.store(user)
@@ -1,7 +1,7 @@
 from __future__ import annotations
 
 from datetime import datetime
-from typing import List, Optional
+from typing import List, Literal, Optional
 from uuid import UUID
 
 from pydantic import BaseModel, Field, ConfigDict
@@ -67,21 +67,21 @@ class OrderCreate(BaseModel):
 
 
 class OrderItemRead(BaseModel):
-    model_config = ConfigDict(from_attributes=True)
+    model_config = ConfigDict(from_attributes=True, populate_by_name=True)
 
     id: UUID | str
-    productId: str = Field(alias="product_id")
-    productName: str = Field(alias="product_name")
+    productId: str = Field(validation_alias="product_id")
+    productName: str = Field(validation_alias="product_name")
     quantity: int
-    unitPrice: int = Field(alias="unit_price")
+    unitPrice: int = Field(validation_alias="unit_price")
 
 
 class OrderRead(BaseModel):
-    model_config = ConfigDict(from_attributes=True)
+    model_config = ConfigDict(from_attributes=True, populate_by_name=True)
 
     id: UUID | str
-    userId: str = Field(alias="user_id")
-    totalAmount: int = Field(alias="total_amount")
+    userId: str = Field(validation_alias="user_id")
+    totalAmount: int = Field(validation_alias="total_amount")
     status: str
     createdAt: datetime
     updatedAt: datetime
@@ -98,6 +98,16 @@ class UpdateCartItemRequest(BaseModel):
     quantity: int
 
 
+class CartOperation(BaseModel):
+    op: Literal["set", "add", "remove"]
+    productId: str
+    quantity: int = 0
+
+
+class BulkUpdateCartRequest(BaseModel):
+    operations: List[CartOperation]
+
+
 class CartItemRead(BaseModel):
     productId: str
     productName: str
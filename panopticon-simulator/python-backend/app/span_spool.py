@@ -0,0 +1,309 @@
+"""Disk-spooled OTLP span export.
+
+The exporter handed to ``BatchSpanProcessor`` only serializes spans and
+appends them to local segment files, so a slow or unreachable collector
+never blocks the processor queue. A background thread ships the spooled
+batches to the collector with exponential backoff and resumes from the
+persisted cursor after a restart (delivery is at-least-once). Headers,
+compression and the CA certificate are read from the same
+``OTEL_EXPORTER_OTLP_*`` variables as ``OTLPSpanExporter``.
+
+A spool directory belongs to one process at a time; a second process gets
+:class:`SpoolLocked` and should fall back to exporting directly.
+"""
+from __future__ import annotations
+
+import fcntl
+import gzip
+import os
+import random
+import struct
+import threading
+import zlib
+from pathlib import Path
+from typing import Dict, Optional, Sequence, Tuple, Union
+
+import requests
+from opentelemetry.exporter.otlp.proto.common.trace_encoder import encode_spans
+from opentelemetry.exporter.otlp.proto.http import Compression
+from opentelemetry.sdk.environment_variables import (
+    OTEL_EXPORTER_OTLP_CERTIFICATE,
+    OTEL_EXPORTER_OTLP_COMPRESSION,
+    OTEL_EXPORTER_OTLP_HEADERS,
+    OTEL_EXPORTER_OTLP_TRACES_CERTIFICATE,
+    OTEL_EXPORTER_OTLP_TRACES_COMPRESSION,
+    OTEL_EXPORTER_OTLP_TRACES_HEADERS,
+)
+from opentelemetry.sdk.trace import ReadableSpan
+from opentelemetry.sdk.trace.export import SpanExporter, SpanExportResult
+from opentelemetry.util.re import parse_env_headers
+
+from .logger import get_logger
+
+logger = get_logger("span_spool")
+
+_RECORD_HEADER = struct.Struct(">I")
+_SEGMENT_SUFFIX = ".seg"
+_CURSOR_FILE = "cursor"
+_LOCK_FILE = "lock"
+
+
+class SpoolLocked(RuntimeError):
+    """The spool directory is already in use by another process."""
+
+
+class SpanSpool:
+    """Bounded append-only spool made of numbered segment files.
+
+    Each record is a length-prefixed serialized ``ExportTraceServiceRequest``.
+    The read position (segment sequence + byte offset) is persisted in a
+    cursor file so unsent batches are replayed after a restart.
+    """
+
+    def __init__(self, directory: str, max_bytes: int, segment_bytes: int) -> None:
+        self.directory = Path(directory)
+        self.directory.mkdir(parents=True, exist_ok=True)
+        # Two writers would interleave appends and overwrite each other's cursor.
+        self._lock_file = open(self.directory / _LOCK_FILE, "w")
+        try:
+            fcntl.flock(self._lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except BlockingIOError:
+            self._lock_file.close()
+            raise SpoolLocked(f"span spool {self.directory} is in use by another process") from None
+        self.max_bytes = max_bytes
+        self.segment_bytes = segment_bytes
+        self._lock = threading.Lock()
+
+        self._segments: Dict[int, int] = {
+            int(path.stem): path.stat().st_size
+            for path in self.directory.glob(f"*{_SEGMENT_SUFFIX}")
+            if path.stem.isdigit()
+        }
+        self._read_seq, self._read_offset = self._load_cursor()
+        for seq in [seq for seq in self._segments if seq < self._read_seq]:
+            self._remove_segment(seq)
+        if not self._segments:
+            self._segments[self._read_seq] = 0
+            self._segment_path(self._read_seq).touch()
+        if self._read_seq not in self._segments:
+            self._read_seq, self._read_offset = min(self._segments), 0
+        self._write_seq = max(self._segments)
+        if self._segments[self._write_seq]:
+            # Never append after a possibly torn tail left by a previous process.
+            self._write_seq += 1
+            self._segments[self._write_seq] = 0
+        self._writer = open(self._segment_path(self._write_seq), "ab")
+
+    def _segment_path(self, seq: int) -> Path:
+        return self.directory / f"{seq:020d}{_SEGMENT_SUFFIX}"
+
+    def _load_cursor(self) -> Tuple[int, int]:
+        try:
+            seq, offset = (self.directory / _CURSOR_FILE).read_text().split()
+            return int(seq), int(offset)
+        except (OSError, ValueError):
+            return (min(self._segments) if self._segments else 0), 0
+
+    def _save_cursor(self) -> None:
+        tmp_path = self.directory / f"{_CURSOR_FILE}.tmp"
+        tmp_path.write_text(f"{self._read_seq} {self._read_offset}")
+        os.replace(tmp_path, self.directory / _CURSOR_FILE)
+
+    def _remove_segment(self, seq: int) -> None:
+        self._segments.pop(seq, None)
+        try:
+            self._segment_path(seq).unlink()
+        except FileNotFoundError:
+            pass
+
+    @property
+    def size_bytes(self) -> int:
+        with self._lock:
+            return sum(self._segments.values()) - self._read_offset
+
+    def append(self, payload: bytes) -> bool:
+        """Append one record; returns ``False`` when the spool is full."""
+        record_size = _RECORD_HEADER.size + len(payload)
+        with self._lock:
+            if sum(self._segments.values()) - self._read_offset + record_size > self.max_bytes:
+                return False
+            if self._segments[self._write_seq] and self._segments[self._write_seq] + record_size > self.segment_bytes:
+                self._writer.close()
+                self._write_seq += 1
+                self._segments[self._write_seq] = 0
+                self._writer = open(self._segment_path(self._write_seq), "ab")
+            self._writer.write(_RECORD_HEADER.pack(len(payload)) + payload)
+            self._writer.flush()
+            self._segments[self._write_seq] += record_size
+            return True
+
+    def peek(self) -> Optional[bytes]:
+        """Return the oldest unsent record without consuming it."""
+        with self._lock:
+            while True:
+                segment_size = self._segments.get(self._read_seq, 0)
+                if self._read_offset >= segment_size:
+                    if self._read_seq >= self._write_seq:
+                        return None
+                    self._remove_segment(self._read_seq)
+                    self._read_seq += 1
+                    self._read_offset = 0
+                    self._save_cursor()
+                    continue
+                with open(self._segment_path(self._read_seq), "rb") as segment:
+                    segment.seek(self._read_offset)
+                    header = segment.read(_RECORD_HEADER.size)
+                    length = _RECORD_HEADER.unpack(header)[0] if len(header) == _RECORD_HEADER.size else -1
+                    payload = segment.read(length) if length >= 0 else b""
+                if len(payload) == length:
+                    return payload
+                # Torn write from a crash: skip the remainder of the segment.
+                logger.warning("discarding truncated spool record", segment=self._read_seq)
+                self._read_offset = segment_size
+
+    def commit(self, payload: bytes) -> None:
+        """Advance the cursor past the record returned by :meth:`peek`."""
+        with self._lock:
+            self._read_offset += _RECORD_HEADER.size + len(payload)
+            self._save_cursor()
+
+    def close(self) -> None:
+        with self._lock:
+            self._writer.close()
+            self._lock_file.close()
+
+
+class SpoolingSpanExporter(SpanExporter):
+    """``SpanExporter`` that spools batches to disk and ships them asynchronously."""
+
+    _MIN_BACKOFF = 1.0
+    _MAX_BACKOFF = 60.0
+
+    def __init__(
+        self,
+        endpoint: str,
+        spool_dir: str,
+        max_bytes: int = 64 * 1024 * 1024,
+        segment_bytes: int = 4 * 1024 * 1024,
+        timeout: float = 10.0,
+        headers: Optional[Dict[str, str]] = None,
+        compression: Optional[Compression] = None,
+    ) -> None:
+        self._endpoint = endpoint
+        self._timeout = timeout
+        self._spool = SpanSpool(spool_dir, max_bytes=max_bytes, segment_bytes=segment_bytes)
+        self._compression = compression or Compression(
+            _otlp_env(OTEL_EXPORTER_OTLP_TRACES_COMPRESSION, OTEL_EXPORTER_OTLP_COMPRESSION, "none").strip().lower()
+        )
+        self._verify: Union[str, bool] = _otlp_env(
+            OTEL_EXPORTER_OTLP_TRACES_CERTIFICATE, OTEL_EXPORTER_OTLP_CERTIFICATE, True
+        )
+        self._session = requests.Session()
+        self._session.headers.update(
+            headers or parse_env_headers(_otlp_env(OTEL_EXPORTER_OTLP_TRACES_HEADERS, OTEL_EXPORTER_OTLP_HEADERS, ""))
+        )
+        self._session.headers.update({"Content-Type": "application/x-protobuf"})
+        if self._compression is not Compression.NoCompression:
+            self._session.headers.update({"Content-Encoding": self._compression.value})
+
+        self._wakeup = threading.Event()
+        self._stopped = threading.Event()
+        self._idle = threading.Event()
+        # Orders "append + clear idle" against "spool found empty + set idle" so
+        # force_flush never sees a stale idle flag while a batch is unsent.
+        self._idle_lock = threading.Lock()
+        self._stats_lock = threading.Lock()
+        self.spooled_batches = 0
+        self.exported_batches = 0
+        self.dropped_batches = 0
+        self.failed_attempts = 0
+
+        self._shipper = threading.Thread(target=self._ship_loop, name="span-spool-shipper", daemon=True)
+        self._shipper.start()
+
+    def export(self, spans: Sequence[ReadableSpan]) -> SpanExportResult:
+        if self._stopped.is_set():
+            return SpanExportResult.FAILURE
+        payload = encode_spans(spans).SerializePartialToString()
+        with self._idle_lock:
+            if not self._spool.append(payload):
+                self._count("dropped_batches")
+                return SpanExportResult.FAILURE
+            self._idle.clear()
+        self._count("spooled_batches")
+        self._wakeup.set()
+        return SpanExportResult.SUCCESS
+
+    def force_flush(self, timeout_millis: int = 30000) -> bool:
+        self._wakeup.set()
+        return self._idle.wait(timeout_millis / 1000)
+
+    def shutdown(self) -> None:
+        self._stopped.set()
+        self._wakeup.set()
+        self._shipper.join(timeout=self._timeout)
+        self._spool.close()
+        self._session.close()
+
+    def stats(self) -> Dict[str, int]:
+        with self._stats_lock:
+            return {
+                "spool_bytes": self._spool.size_bytes,
+                "spooled_batches": self.spooled_batches,
+                "exported_batches": self.exported_batches,
+                "dropped_batches": self.dropped_batches,
+                "failed_attempts": self.failed_attempts,
+            }
+
+    def _count(self, name: str) -> None:
+        with self._stats_lock:
+            setattr(self, name, getattr(self, name) + 1)
+
+    def _post(self, payload: bytes) -> Optional[requests.Response]:
+        # Records are spooled uncompressed so a compression change applies to replayed batches too.
+        if self._compression is Compression.Gzip:
+            payload = gzip.compress(payload)
+        elif self._compression is Compression.Deflate:
+            payload = zlib.compress(payload)
+        try:
+            return self._session.post(self._endpoint, data=payload, timeout=self._timeout, verify=self._verify)
+        except requests.RequestException as exc:
+            logger.warning("span export failed", error=str(exc))
+            return None
+
+    def _ship_loop(self) -> None:
+        backoff = 0.0
+        while not self._stopped.is_set():
+            with self._idle_lock:
+                payload = self._spool.peek()
+                if payload is None:
+                    self._idle.set()
+            if payload is None:
+                self._wakeup.wait()
+                self._wakeup.clear()
+                continue
+
+            response = self._post(payload)
+            if response is not None and response.ok:
+                self._spool.commit(payload)
+                self._count("exported_batches")
+                backoff = 0.0
+                continue
+            if response is not None and not _retryable(response):
+                logger.warning("collector rejected span batch", status_code=response.status_code)
+                self._spool.commit(payload)
+                self._count("dropped_batches")
+                continue
+
+            self._count("failed_attempts")
+            backoff = min(self._MAX_BACKOFF, max(self._MIN_BACKOFF, backoff * 2))
+            self._stopped.wait(backoff * random.uniform(0.5, 1.0))
+
+
+def _otlp_env(traces_name: str, name: str, default):
+    return os.environ.get(traces_name, os.environ.get(name, default))
+
+
+def _retryable(response: requests.Response) -> bool:
+    return response.status_code in (408, 429) or 500 <= response.status_code <= 599
+
@@ -1,4 +1,4 @@
-from typing import Optional
+from typing import Dict, Optional
 
 from fastapi import FastAPI
 from opentelemetry import trace
@@ -11,9 +11,16 @@ from opentelemetry.sdk.trace import TracerProvider
 from opentelemetry.sdk.trace.export import BatchSpanProcessor
 
 from .config import get_settings
+from .logger import get_logger
+from .span_spool import SpoolLocked, SpoolingSpanExporter
+
+logger = get_logger("telemetry")
+
+span_exporter: Optional[SpoolingSpanExporter] = None
 
 
 def setup_telemetry(app: FastAPI, engine) -> None:
+    global span_exporter
     settings = get_settings()
     resource = Resource.create(
         {
@@ -23,10 +30,28 @@ def setup_telemetry(app: FastAPI, engine) -> None:
         }
     )
     provider = TracerProvider(resource=resource)
-    exporter = OTLPSpanExporter(endpoint=f"{settings.otlp_endpoint}/v1/traces", timeout=10)
+    endpoint = f"{settings.otlp_endpoint}/v1/traces"
+    exporter = None
+    if settings.otel_spool_enabled:
+        try:
+            exporter = span_exporter = SpoolingSpanExporter(
+                endpoint,
+                spool_dir=settings.otel_spool_dir,
+                max_bytes=settings.otel_spool_max_bytes,
+                timeout=10,
+            )
+        except SpoolLocked as exc:
+            # e.g. ``uvicorn --workers N`` sharing one OTEL_SPOOL_DIR: only the first worker spools.
+            logger.warning("span spool unavailable, exporting directly", error=str(exc))
+    if exporter is None:
+        exporter = OTLPSpanExporter(endpoint=endpoint, timeout=10)
     provider.add_span_processor(BatchSpanProcessor(exporter))
     trace.set_tracer_provider(provider)
 
     FastAPIInstrumentor.instrument_app(app, tracer_provider=provider)
     Psycopg2Instrumentor().instrument()
     SQLAlchemyInstrumentor().instrument(engine=engine, tracer_provider=provider)
+
+
+def telemetry_stats() -> Dict[str, int]:
+    return span_exporter.stats() if span_exporter else {}
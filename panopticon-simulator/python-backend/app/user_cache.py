@@ -0,0 +1,159 @@
+"""Bounded id/email -> user cache for the hot checkout, cart and login paths.
+
+Entries are detached snapshots, never ORM instances, so they can be shared
+across sessions. Unknown ids are cached negatively for a shorter TTL. Local
+mutations of ``User`` rows are collected at flush time and invalidate entries
+once the transaction commits; a lookup that raced with the invalidation does
+not store what it read. Changes made by other replicas become visible once the
+TTL expires.
+"""
+from __future__ import annotations
+
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Dict, Hashable, Optional, Set, Tuple
+
+from sqlalchemy import event
+from sqlalchemy.orm import Session, attributes, object_session
+
+from . import queries
+from .config import get_settings
+from .models import User
+
+
+@dataclass(frozen=True)
+class CachedUser:
+    id: str
+    email: str
+    name: str
+    created_at: datetime
+
+    @classmethod
+    def from_model(cls, user: User) -> "CachedUser":
+        return cls(id=user.id, email=user.email, name=user.name, created_at=user.created_at)
+
+
+class UserCache:
+    def __init__(self, max_entries: int = 10000, ttl: float = 60.0, negative_ttl: float = 5.0) -> None:
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.negative_ttl = negative_ttl
+        self._lock = threading.Lock()
+        # key -> (expires_at, user or None for a negative entry)
+        self._entries: "OrderedDict[Hashable, Tuple[float, Optional[CachedUser]]]" = OrderedDict()
+        # Bumped by every invalidation; lookups only store rows read under an unchanged generation.
+        self._generation = 0
+        self.hits = 0
+        self.negative_hits = 0
+        self.misses = 0
+
+    def _get(self, key: Hashable) -> Tuple[bool, Optional[CachedUser]]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry[0] < time.monotonic():
+                if entry is not None:
+                    del self._entries[key]
+                self.misses += 1
+                return False, None
+            self._entries.move_to_end(key)
+            if entry[1] is None:
+                self.negative_hits += 1
+            else:
+                self.hits += 1
+            return True, entry[1]
+
+    def _put(self, key: Hashable, user: Optional[CachedUser], ttl: float, generation: Optional[int] = None) -> None:
+        with self._lock:
+            if generation is not None and generation != self._generation:
+                return
+            self._entries[key] = (time.monotonic() + ttl, user)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def store(self, user: User, generation: Optional[int] = None) -> CachedUser:
+        cached = CachedUser.from_model(user)
+        self._put(("id", cached.id), cached, self.ttl, generation)
+        self._put(("email", cached.email), cached, self.ttl, generation)
+        return cached
+
+    def invalidate(self, user_id: Optional[str] = None, email: Optional[str] = None) -> None:
+        with self._lock:
+            self._generation += 1
+            self._entries.pop(("id", user_id), None)
+            self._entries.pop(("email", email), None)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def get_user(self, db: Session, user_id: str) -> Optional[CachedUser]:
+        found, cached = self._get(("id", user_id))
+        if found:
+            return cached
+        generation = self._generation
+        user = queries.get_user(db, user_id)
+        if user is None:
+            self._put(("id", user_id), None, self.negative_ttl, generation)
+            return None
+        return self.store(user, generation)
+
+    def get_user_by_email(self, db: Session, email: str) -> Optional[CachedUser]:
+        # Emails are only cached positively: an unknown email is usually about to be registered.
+        found, cached = self._get(("email", email))
+        if found and cached is not None:
+            return cached
+        generation = self._generation
+        user = queries.get_user_by_email(db, email)
+        return self.store(user, generation) if user is not None else None
+
+    def stats(self) -> Dict[str, object]:
+        with self._lock:
+            lookups = self.hits + self.negative_hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "hits": self.hits,
+                "negative_hits": self.negative_hits,
+                "misses": self.misses,
+                "hit_rate": round((self.hits + self.negative_hits) / lookups, 4) if lookups else 0.0,
+            }
+
+
+settings = get_settings()
+user_cache = UserCache(
+    max_entries=settings.user_cache_max_entries,
+    ttl=settings.user_cache_ttl_seconds,
+    negative_ttl=settings.user_cache_negative_ttl_seconds,
+)
+
+
+_PENDING_INVALIDATIONS = "user_cache_invalidations"
+
+
+@event.listens_for(User, "after_insert")
+@event.listens_for(User, "after_update")
+@event.listens_for(User, "after_delete")
+def _collect_invalidation(mapper, connection, target: User) -> None:
+    # Invalidating here, before the commit, would let a concurrent lookup re-cache the old row.
+    keys: Set[Tuple[Optional[str], Optional[str]]] = {(target.id, target.email)}
+    keys.update((None, old_email) for old_email in attributes.get_history(target, "email").deleted or ())
+    session = object_session(target)
+    if session is None:
+        for user_id, email in keys:
+            user_cache.invalidate(user_id=user_id, email=email)
+        return
+    session.info.setdefault(_PENDING_INVALIDATIONS, set()).update(keys)
+
+
+@event.listens_for(Session, "after_commit")
+def _invalidate_committed(session: Session) -> None:
+    for user_id, email in session.info.pop(_PENDING_INVALIDATIONS, ()):
+        user_cache.invalidate(user_id=user_id, email=email)
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_invalidations(session: Session) -> None:
+    session.info.pop(_PENDING_INVALIDATIONS, None)
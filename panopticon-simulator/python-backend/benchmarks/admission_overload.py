@@ -0,0 +1,261 @@
+"""Tail latency and throughput under a slowed database, with and without admission control.
+
+Usage:
+    python -m benchmarks.admission_overload [--clients 200] [--seconds 10] [--db-delay-ms 50]
+
+For each mode the server runs under uvicorn in its own process, against a
+SQLite file whose queries are slowed by ``--db-delay-ms``, so requests back
+up in the threadpool and the SQLAlchemy pool queue the same way they do when
+Postgres slows down. The load generator runs in this process and never
+shares an event loop with the server.
+
+Exits non-zero unless, with admission on, browsing p99 stays within
+``--max-p99-ms`` and browsing completes at least ``--min-browse-ratio`` of
+the successful requests it completes with admission off. Below
+``ADMISSION_MAX_LIMIT`` clients (e.g. ``--clients 100``) the limiter should
+not shed anything, so the default ratio is close to 1.
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import os
+import random
+import socket
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from typing import Dict, List, Optional, Tuple
+
+BROWSE, CHECKOUT, HEALTH = "/products", "/orders/", "/health"
+
+
+def _percentile(values: List[float], pct: int) -> Optional[float]:
+    if len(values) < 2:
+        return values[0] if values else None
+    return statistics.quantiles(values, n=100, method="inclusive")[pct - 1]
+
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def serve(args) -> None:
+    import uvicorn
+    from sqlalchemy import event
+
+    from app.database import engine
+    from app.main import app
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def _slow_database(*_):
+        time.sleep(args.db_delay_ms / 1000)
+
+    uvicorn.run(app, host="127.0.0.1", port=args.port, log_level="warning", access_log=False)
+
+
+class _Connection:
+    """Minimal keep-alive HTTP/1.1 client, one per worker.
+
+    httpx's shared pool costs more CPU per request than the server does once
+    a couple of hundred requests are in flight, which on a small box turns the
+    load generator into the bottleneck being measured.
+    """
+
+    def __init__(self, host: str, port: int) -> None:
+        self.host = host
+        self.port = port
+        self._reader: Optional[asyncio.StreamReader] = None
+        self._writer: Optional[asyncio.StreamWriter] = None
+
+    async def request(
+        self, method: str, path: str, body: Optional[dict] = None, headers: str = ""
+    ) -> Tuple[int, Dict[str, str], bytes]:
+        if self._writer is None:
+            self._reader, self._writer = await asyncio.open_connection(self.host, self.port)
+        payload = json.dumps(body).encode() if body is not None else b""
+        head = f"{method} {path} HTTP/1.1\r\nHost: {self.host}\r\n{headers}"
+        if body is not None:
+            head += f"Content-Type: application/json\r\nContent-Length: {len(payload)}\r\n"
+        try:
+            self._writer.write(head.encode() + b"\r\n" + payload)
+            status_line, *lines = (await self._reader.readuntil(b"\r\n\r\n")).decode().split("\r\n")
+            response_headers = dict(line.lower().split(": ", 1) for line in lines if line)
+            content = await self._reader.readexactly(int(response_headers.get("content-length", "0")))
+        except (OSError, asyncio.IncompleteReadError):
+            self.close()
+            raise
+        if response_headers.get("connection") == "close":
+            self.close()
+        return int(status_line.split()[1]), response_headers, content
+
+    def close(self) -> None:
+        if self._writer is not None:
+            self._writer.close()
+        self._reader = self._writer = None
+
+
+async def _wait_ready(connection: _Connection, process: subprocess.Popen, timeout: float = 60.0) -> None:
+    deadline = time.perf_counter() + timeout
+    while time.perf_counter() < deadline:
+        if process.poll() is not None:
+            raise SystemExit(f"server exited with code {process.returncode}")
+        try:
+            if (await connection.request("GET", HEALTH))[0] == 200:
+                return
+        except (OSError, asyncio.IncompleteReadError):
+            pass
+        await asyncio.sleep(0.2)
+    raise SystemExit("server did not become ready")
+
+
+async def drive(
+    port: int, process: subprocess.Popen, clients: int, seconds: float, debug_token: str
+) -> Dict[str, Dict]:
+    latencies: Dict[str, List[float]] = {BROWSE: [], CHECKOUT: [], HEALTH: []}
+    rejected = {path: 0 for path in latencies}
+    errors = {path: 0 for path in latencies}
+
+    control = _Connection("127.0.0.1", port)
+    await _wait_ready(control, process)
+    users = json.loads((await control.request("GET", "/users/"))[2])
+    products = json.loads((await control.request("GET", BROWSE))[2])
+    checkout = {"userId": users[0]["id"], "items": [{"productId": products[0]["id"], "quantity": 1}]}
+    # uvicorn drops idle keep-alive connections after 5 s; reconnect after the run.
+    control.close()
+    deadline = time.perf_counter() + seconds
+
+    async def worker(index: int) -> None:
+        # Mostly browsing with some checkouts; health is probed separately below.
+        method, path, body = ("POST", CHECKOUT, checkout) if index % 10 == 0 else ("GET", BROWSE, None)
+        connection = _Connection("127.0.0.1", port)
+        while time.perf_counter() < deadline:
+            start = time.perf_counter()
+            try:
+                status_code, headers, _ = await connection.request(method, path, body)
+            except (OSError, asyncio.IncompleteReadError):
+                errors[path] += 1
+                continue
+            if status_code == 503:
+                rejected[path] += 1
+                # Jittered like a real client's backoff, so shed clients do not come back in lockstep.
+                await asyncio.sleep(float(headers.get("retry-after", "1")) / 10 * random.uniform(0.5, 1.5))
+                continue
+            if status_code >= 400:
+                errors[path] += 1
+                continue
+            latencies[path].append((time.perf_counter() - start) * 1000)
+        connection.close()
+
+    async def probe() -> None:
+        connection = _Connection("127.0.0.1", port)
+        while time.perf_counter() < deadline:
+            start = time.perf_counter()
+            await connection.request("GET", HEALTH)
+            latencies[HEALTH].append((time.perf_counter() - start) * 1000)
+            await asyncio.sleep(0.2)
+        connection.close()
+
+    await asyncio.gather(probe(), *(worker(index) for index in range(clients)))
+    stats = await control.request("GET", "/debug/stats", headers=f"X-Debug-Token: {debug_token}\r\n")
+    control.close()
+
+    result = {
+        path: {
+            "ok": len(values),
+            "rejected": rejected[path],
+            "errors": errors[path],
+            "p50_ms": _percentile(values, 50),
+            "p99_ms": _percentile(values, 99),
+        }
+        for path, values in latencies.items()
+    }
+    result["admission"] = json.loads(stats[2]).get("admission")
+    return result
+
+
+def run_mode(mode: str, args, tmp: str) -> Dict[str, Dict]:
+    port = _free_port()
+    env = {
+        **os.environ,
+        "DATABASE_URL": f"sqlite:///{tmp}/bench-{mode}.db",
+        "ADMISSION_ENABLED": "true" if mode == "on" else "false",
+        "OTEL_SPOOL_DIR": f"{tmp}/spool-{mode}",
+        "DEBUG_TOKEN": "bench",
+    }
+    command = [
+        sys.executable, "-m", "benchmarks.admission_overload",
+        "--serve", "--port", str(port), "--db-delay-ms", str(args.db_delay_ms),
+    ]
+    process = subprocess.Popen(command, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    try:
+        return asyncio.run(
+            drive(port, process, args.clients, args.seconds, env["DEBUG_TOKEN"])
+        )
+    finally:
+        process.terminate()
+        process.wait(timeout=30)
+
+
+def _format(value: Optional[float]) -> str:
+    return f"{value:.1f}" if value is not None else "-"
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--clients", type=int, default=200)
+    parser.add_argument("--seconds", type=float, default=10.0)
+    parser.add_argument("--db-delay-ms", type=float, default=50.0)
+    parser.add_argument("--max-p99-ms", type=float, default=2000.0, help="browsing p99 bound with admission on")
+    parser.add_argument(
+        "--min-browse-ratio",
+        type=float,
+        default=0.9,
+        help="browsing successes with admission on, as a fraction of those with admission off",
+    )
+    parser.add_argument("--serve", action="store_true", help=argparse.SUPPRESS)
+    parser.add_argument("--port", type=int, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.serve:
+        serve(args)
+        return
+
+    results = {}
+    with tempfile.TemporaryDirectory() as tmp:
+        for mode in ("off", "on"):
+            results[mode] = result = run_mode(mode, args, tmp)
+            print(f"admission {mode}:")
+            for path in (BROWSE, CHECKOUT, HEALTH):
+                entry = result[path]
+                print(
+                    f"  {path:<10} ok={entry['ok']} ({entry['ok'] / args.seconds:.1f}/s) "
+                    f"rejected={entry['rejected']} errors={entry['errors']} "
+                    f"p50_ms={_format(entry['p50_ms'])} p99_ms={_format(entry['p99_ms'])}"
+                )
+            if mode == "on":
+                print(f"  limiter    {result['admission']}")
+
+    on, off = results["on"][BROWSE], results["off"][BROWSE]
+    failures = []
+    if on["p99_ms"] is None or on["p99_ms"] > args.max_p99_ms:
+        failures.append(f"browsing p99 {_format(on['p99_ms'])} ms exceeds {args.max_p99_ms} ms")
+    if on["ok"] < args.min_browse_ratio * off["ok"]:
+        failures.append(
+            f"browsing completed {on['ok']} requests with admission on, "
+            f"below {args.min_browse_ratio:.0%} of {off['ok']} with admission off"
+        )
+    for failure in failures:
+        print(f"FAIL: {failure}")
+    if failures:
+        sys.exit(1)
+    print("OK")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,184 @@
+"""Single-flight coalescing checks for threadpool and asyncio callers.
+
+Usage:
+    python -m benchmarks.coalescing [--callers 50]
+
+Runs ``--callers`` concurrent identical reads through ``SingleFlight.do`` from
+threads, through ``do_async`` from tasks, and mixed, and checks that each
+burst runs the load once. Also checks that a leader's error reaches every
+waiter, that a waiter gives up with ``CoalesceTimeout`` while the leader
+still finishes, that waiters of a cancelled async leader retry instead of
+being cancelled, and that no future is left with an unretrieved exception.
+Exits non-zero when a check fails.
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import gc
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from app.coalesce import CoalesceTimeout, SingleFlight
+
+
+class Load:
+    def __init__(self, seconds: float = 0.05, error: Exception = None) -> None:
+        self.seconds = seconds
+        self.error = error
+        self.calls = 0
+        self._lock = threading.Lock()
+
+    def _count(self) -> int:
+        with self._lock:
+            self.calls += 1
+            return self.calls
+
+    def __call__(self) -> int:
+        call = self._count()
+        time.sleep(self.seconds)
+        if self.error is not None:
+            raise self.error
+        return call
+
+    async def run_async(self) -> int:
+        call = self._count()
+        await asyncio.sleep(self.seconds)
+        if self.error is not None:
+            raise self.error
+        return call
+
+
+def _outcome(fn):
+    try:
+        return fn()
+    except Exception as exc:
+        return exc
+
+
+async def _outcome_async(awaitable):
+    try:
+        return await awaitable
+    except Exception as exc:
+        return exc
+
+
+def run_threads(flights: SingleFlight, key, load: Load, callers: int) -> list:
+    with ThreadPoolExecutor(max_workers=callers) as pool:
+        return list(pool.map(lambda _: _outcome(lambda: flights.do(key, load)), range(callers)))
+
+
+async def run_tasks(flights: SingleFlight, key, load: Load, callers: int) -> list:
+    return await asyncio.gather(*(_outcome_async(flights.do_async(key, load.run_async)) for _ in range(callers)))
+
+
+async def run_mixed(flights: SingleFlight, key, load: Load, callers: int) -> list:
+    loop = asyncio.get_running_loop()
+    with ThreadPoolExecutor(max_workers=callers) as pool:
+        leader = loop.run_in_executor(pool, lambda: _outcome(lambda: flights.do(key, load)))
+        await asyncio.sleep(0.01)
+        waiters = [_outcome_async(flights.do_async(key, load.run_async)) for _ in range(callers - 1)]
+        return await asyncio.gather(leader, *waiters)
+
+
+async def run_waiter_timeout(flights: SingleFlight, key, load: Load) -> list:
+    leader = asyncio.ensure_future(_outcome_async(flights.do_async(key, load.run_async)))
+    await asyncio.sleep(0.01)
+    waiter = await _outcome_async(flights.do_async(key, load.run_async))
+    return [await leader, waiter]
+
+
+async def run_leader_cancel(flights: SingleFlight, key, load: Load, callers: int) -> list:
+    leader = asyncio.ensure_future(flights.do_async(key, load.run_async))
+    await asyncio.sleep(0.01)
+    waiters = [asyncio.ensure_future(_outcome_async(flights.do_async(key, load.run_async))) for _ in range(callers)]
+    await asyncio.sleep(0.01)
+    leader.cancel()
+    try:
+        await leader
+    except asyncio.CancelledError:
+        pass
+    return await asyncio.gather(*waiters)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--callers", type=int, default=50)
+    args = parser.parse_args()
+    callers = args.callers
+    failures = []
+    unhandled = []
+
+    def check(condition: bool, message: str) -> None:
+        print(f"{'ok  ' if condition else 'FAIL'} {message}")
+        if not condition:
+            failures.append(message)
+
+    def on_loop_exception(loop, context) -> None:
+        unhandled.append(context.get("message"))
+
+    async def run_async_checks(flights: SingleFlight) -> None:
+        asyncio.get_running_loop().set_exception_handler(on_loop_exception)
+
+        load = Load()
+        results = await run_tasks(flights, "async", load, callers)
+        check(load.calls == 1 and results == [1] * callers, f"{callers} tasks share one load ({load.calls} calls)")
+
+        load = Load()
+        results = await run_mixed(flights, "mixed", load, callers)
+        check(load.calls == 1 and results == [1] * callers, f"tasks join a threadpool leader ({load.calls} calls)")
+
+        load = Load(error=LookupError("missing"))
+        results = await run_tasks(flights, "async-error", load, callers)
+        check(
+            load.calls == 1 and all(isinstance(result, LookupError) for result in results),
+            "leader error reaches every task",
+        )
+
+        load = Load(seconds=0.3)
+        leader, waiter = await run_waiter_timeout(SingleFlight(timeout=0.1), "timeout", load)
+        check(isinstance(waiter, CoalesceTimeout), f"waiter gives up with CoalesceTimeout ({type(waiter).__name__})")
+        check(leader == 1 and load.calls == 1, "leader still finishes after its waiter timed out")
+
+        load = Load()
+        results = await run_leader_cancel(flights, "cancel", load, callers)
+        check(
+            all(isinstance(result, int) for result in results) and load.calls == 2,
+            f"waiters of a cancelled leader retry under a new leader ({load.calls} calls, {set(map(type, results))})",
+        )
+
+        load = Load(seconds=0.3)
+        stuck = SingleFlight(timeout=0.1)
+        first = asyncio.ensure_future(stuck.do_async("stuck", load.run_async))
+        await asyncio.sleep(0.15)
+        await stuck.do_async("stuck", load.run_async)
+        await first
+        check(load.calls == 2, "a flight older than the timeout is not joined")
+
+    flights = SingleFlight(timeout=5.0)
+
+    load = Load()
+    results = run_threads(flights, "threads", load, callers)
+    check(load.calls == 1 and results == [1] * callers, f"{callers} threads share one load ({load.calls} calls)")
+
+    load = Load(error=LookupError("missing"))
+    results = run_threads(flights, "thread-error", load, callers)
+    check(
+        load.calls == 1 and all(isinstance(result, LookupError) for result in results),
+        "leader error reaches every thread",
+    )
+
+    asyncio.run(run_async_checks(flights))
+    gc.collect()
+    check(not unhandled, f"no unretrieved future exceptions ({unhandled})")
+
+    stats = flights.stats()
+    check(stats["in_flight"] == 0, "no flights left behind")
+    print(f"     stats {stats}")
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,76 @@
+"""Python-side CPU per request for the hot lookups: legacy Query vs cached select().
+
+Usage:
+    python -m benchmarks.lookup_cpu [--requests 5000]
+
+Uses ``DATABASE_URL`` when set, otherwise an in-memory SQLite database, so the
+numbers isolate statement construction/compilation from network latency.
+"""
+from __future__ import annotations
+
+import argparse
+import os
+import time
+
+os.environ.setdefault("DATABASE_URL", "sqlite://")
+
+from sqlalchemy.orm import joinedload  # noqa: E402
+
+from app import queries  # noqa: E402
+from app.database import Base, SessionLocal, engine  # noqa: E402
+from app.models import Cart, CartItem, Product, User  # noqa: E402
+from app.seed import seed_data  # noqa: E402
+
+
+def legacy_request(db, user_id: str, product_id: str) -> None:
+    db.query(Product).filter(Product.id == product_id).first()
+    db.query(User).filter(User.id == user_id).first()
+    (
+        db.query(Cart)
+        .options(joinedload(Cart.items))
+        .filter(Cart.user_id == user_id)
+        .first()
+    )
+
+
+def cached_request(db, user_id: str, product_id: str) -> None:
+    queries.get_product(db, product_id)
+    queries.get_user(db, user_id)
+    queries.get_cart_for_user(db, user_id)
+
+
+def measure(fn, db, user_id: str, product_id: str, requests: int) -> float:
+    for _ in range(min(requests, 200)):
+        fn(db, user_id, product_id)
+    start = time.process_time()
+    for _ in range(requests):
+        fn(db, user_id, product_id)
+        db.expunge_all()
+    return (time.process_time() - start) / requests * 1_000_000
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--requests", type=int, default=5000)
+    args = parser.parse_args()
+
+    Base.metadata.create_all(bind=engine)
+    with SessionLocal() as db:
+        seed_data(db)
+        user = db.query(User).first()
+        product = db.query(Product).first()
+        if not queries.get_cart_for_user(db, user.id):
+            db.add(Cart(user=user, total_amount=product.price, items=[CartItem(product=product, quantity=1, unit_price=product.price)]))
+            db.commit()
+        user_id, product_id = user.id, product.id
+
+        legacy = measure(legacy_request, db, user_id, product_id, args.requests)
+        cached = measure(cached_request, db, user_id, product_id, args.requests)
+
+    print(f"legacy Query : {legacy:8.1f} us CPU/request")
+    print(f"cached select: {cached:8.1f} us CPU/request")
+    print(f"reduction    : {(1 - cached / legacy) * 100:8.1f} %")
+
+
+if __name__ == "__main__":
+    main()
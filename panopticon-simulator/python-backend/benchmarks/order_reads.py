@@ -0,0 +1,112 @@
+"""Order read cost with the product join vs the productName snapshot.
+
+Usage:
+    python -m benchmarks.order_reads [--orders 20000] [--items 3] [--repeat 5]
+
+Uses ``DATABASE_URL`` when set, otherwise a temporary SQLite file. Reports
+the width of the rows fetched by the list-orders query and its median time
+(query + ORM load + serialization) for both variants.
+"""
+from __future__ import annotations
+
+import argparse
+import os
+import statistics
+import tempfile
+import time
+
+if "DATABASE_URL" not in os.environ:
+    os.environ["DATABASE_URL"] = f"sqlite:///{tempfile.mkdtemp()}/order-reads.db"
+
+from sqlalchemy.orm import joinedload  # noqa: E402
+
+from app.database import Base, SessionLocal, engine  # noqa: E402
+from app.migrations import run_migrations  # noqa: E402
+from app.models import Order, OrderItem, Product, User  # noqa: E402
+from app.routers.orders import serialize_order  # noqa: E402
+
+
+def populate(orders: int, items: int) -> None:
+    with SessionLocal() as db:
+        if db.query(Order).count() >= orders:
+            return
+        products = [
+            Product(name=f"Product {index}", description="x" * 200, price=10 + index, stock=1000, category="Bench")
+            for index in range(50)
+        ]
+        user = User(email=f"bench-{time.time()}@example.com", name="Bench")
+        db.add_all([user, *products])
+        db.flush()
+        for start in range(0, orders, 1000):
+            for index in range(start, min(start + 1000, orders)):
+                chosen = [products[(index + offset) % len(products)] for offset in range(items)]
+                db.add(
+                    Order(
+                        user_id=user.id,
+                        total_amount=sum(product.price for product in chosen),
+                        items=[
+                            OrderItem(product_id=product.id, product_name=product.name, quantity=1, unit_price=product.price)
+                            for product in chosen
+                        ],
+                    )
+                )
+            db.commit()
+
+
+def joined_query(db):
+    return db.query(Order).options(joinedload(Order.items).joinedload(OrderItem.product)).order_by(Order.created_at.desc())
+
+
+def snapshot_query(db):
+    return db.query(Order).options(joinedload(Order.items)).order_by(Order.created_at.desc())
+
+
+def joined_serialize(order: Order) -> dict:
+    data = serialize_order(order)
+    for item, entry in zip(order.items, data["items"]):
+        entry["productName"] = item.product.name if item.product else ""
+    return data
+
+
+def row_width(build) -> tuple[int, float]:
+    with SessionLocal() as db:
+        statement = build(db).limit(200).statement
+        with engine.connect() as conn:
+            rows = conn.execute(statement).all()
+    columns = len(rows[0]) if rows else 0
+    avg_bytes = statistics.mean(sum(len(str(value)) for value in row if value is not None) for row in rows) if rows else 0.0
+    return columns, avg_bytes
+
+
+def timed(build, serialize, repeat: int) -> float:
+    samples = []
+    for _ in range(repeat):
+        with SessionLocal() as db:
+            start = time.perf_counter()
+            [serialize(order) for order in build(db).all()]
+            samples.append((time.perf_counter() - start) * 1000)
+    return statistics.median(samples)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--orders", type=int, default=20000)
+    parser.add_argument("--items", type=int, default=3)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    Base.metadata.create_all(bind=engine)
+    run_migrations(engine)
+    populate(args.orders, args.items)
+
+    for label, build, serialize in (
+        ("product join", joined_query, joined_serialize),
+        ("name snapshot", snapshot_query, serialize_order),
+    ):
+        columns, avg_bytes = row_width(build)
+        elapsed = timed(build, serialize, args.repeat)
+        print(f"{label:<14} columns/row={columns:<3} text bytes/row={avg_bytes:7.1f} list orders={elapsed:9.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
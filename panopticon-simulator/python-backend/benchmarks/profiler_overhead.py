@@ -0,0 +1,92 @@
+"""Request throughput with and without a running sampling profile.
+
+Usage:
+    python -m benchmarks.profiler_overhead [--threads 8] [--rounds 6] [--seconds 2] [--interval-ms 10]
+
+Drives ``GET /products`` and ``GET /products/{id}`` in-process from
+``--threads`` client threads against a SQLite file, alternating rounds with
+and without a ``SamplingProfiler`` at ``--interval-ms`` (10 ms = 100 Hz), and
+compares the median throughput. Exits non-zero when the profile costs more
+than ``--max-overhead-pct`` of throughput.
+"""
+from __future__ import annotations
+
+import argparse
+import atexit
+import logging
+import os
+import shutil
+import statistics
+import sys
+import tempfile
+import threading
+import time
+
+_tmp = tempfile.mkdtemp(prefix="profiler-overhead-")
+atexit.register(shutil.rmtree, _tmp, ignore_errors=True)
+os.environ.setdefault("DATABASE_URL", f"sqlite:///{_tmp}/bench.db")
+os.environ.setdefault("OTEL_SPOOL_DIR", f"{_tmp}/spool")
+
+from fastapi.testclient import TestClient  # noqa: E402
+
+from app.main import app  # noqa: E402
+from app.profiler import SamplingProfiler  # noqa: E402
+
+
+def run_round(client: TestClient, paths: list, threads: int, seconds: float) -> float:
+    counts = [0] * threads
+    deadline = time.perf_counter() + seconds
+
+    def worker(index: int) -> None:
+        while time.perf_counter() < deadline:
+            client.get(paths[counts[index] % len(paths)])
+            counts[index] += 1
+
+    workers = [threading.Thread(target=worker, args=(index,)) for index in range(threads)]
+    for thread in workers:
+        thread.start()
+    for thread in workers:
+        thread.join()
+    return sum(counts) / seconds
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--threads", type=int, default=8)
+    parser.add_argument("--rounds", type=int, default=6, help="rounds per mode, alternating")
+    parser.add_argument("--seconds", type=float, default=2.0, help="length of each round")
+    parser.add_argument("--interval-ms", type=float, default=10.0, help="sampling interval while profiling")
+    parser.add_argument("--max-overhead-pct", type=float, default=5.0)
+    args = parser.parse_args()
+
+    logging.disable(logging.CRITICAL)
+    throughput = {"off": [], "on": []}
+    with TestClient(app) as client:
+        product_ids = [product["id"] for product in client.get("/products").json()]
+        paths = ["/products", *(f"/products/{product_id}" for product_id in product_ids)]
+        run_round(client, paths, args.threads, args.seconds)  # warm-up
+
+        samples = 0
+        for _ in range(args.rounds):
+            throughput["off"].append(run_round(client, paths, args.threads, args.seconds))
+            profiler = SamplingProfiler(app, interval=args.interval_ms / 1000)
+            profiler.start()
+            throughput["on"].append(run_round(client, paths, args.threads, args.seconds))
+            samples += profiler.stop().samples
+
+    off, on = statistics.median(throughput["off"]), statistics.median(throughput["on"])
+    overhead = (off - on) / off * 100
+    print(f"profiler off: {off:.0f} req/s (rounds: {', '.join(f'{value:.0f}' for value in throughput['off'])})")
+    print(f"profiler on:  {on:.0f} req/s (rounds: {', '.join(f'{value:.0f}' for value in throughput['on'])})")
+    print(f"overhead at {1000 / args.interval_ms:.0f} Hz: {overhead:.1f}% ({samples} samples)")
+    if samples == 0:
+        print("FAIL: the profiler recorded no samples")
+        sys.exit(1)
+    if overhead > args.max_overhead_pct:
+        print(f"FAIL: overhead above {args.max_overhead_pct}%")
+        sys.exit(1)
+    print("OK")
+
+
+if __name__ == "__main__":
+    main()
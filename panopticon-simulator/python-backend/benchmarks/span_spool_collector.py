@@ -0,0 +1,156 @@
+"""Span spool against a pausable local stand-in collector.
+
+Usage:
+    python -m benchmarks.span_spool_collector [--batches 200]
+
+Starts an OTLP/HTTP stand-in that answers 503 while paused, exports batches
+through ``SpoolingSpanExporter`` while it is paused, restarts the exporter to
+check replay from the persisted cursor, resumes the collector and checks that
+every batch arrives and ``force_flush`` only reports success once the spool is
+empty. Also checks that a full spool drops and counts new batches, that a
+second exporter cannot open a spool directory in use, and that OTLP headers
+and gzip compression reach the collector. Exits non-zero when a check fails.
+"""
+from __future__ import annotations
+
+import argparse
+import gzip
+import sys
+import tempfile
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from opentelemetry.sdk.trace import TracerProvider
+from opentelemetry.sdk.trace.export import SimpleSpanProcessor
+
+from opentelemetry.proto.collector.trace.v1.trace_service_pb2 import ExportTraceServiceRequest
+from opentelemetry.exporter.otlp.proto.http import Compression
+
+from app.span_spool import SpoolingSpanExporter, SpoolLocked
+
+
+class StandInCollector:
+    def __init__(self) -> None:
+        self.paused = threading.Event()
+        self.received = 0
+        self.last_headers = {}
+        self.last_request = None
+        collector = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_POST(self) -> None:
+                body = self.rfile.read(int(self.headers["Content-Length"]))
+                if self.headers.get("Content-Encoding") == "gzip":
+                    body = gzip.decompress(body)
+                collector.last_headers = dict(self.headers)
+                collector.last_request = ExportTraceServiceRequest.FromString(body)
+                if collector.paused.is_set():
+                    self.send_response(503)
+                else:
+                    collector.received += 1
+                    self.send_response(200)
+                self.end_headers()
+
+            def log_message(self, *args) -> None:
+                pass
+
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.endpoint = f"http://127.0.0.1:{self.server.server_port}/v1/traces"
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+
+
+def export_batches(exporter: SpoolingSpanExporter, batches: int) -> None:
+    provider = TracerProvider()
+    provider.add_span_processor(SimpleSpanProcessor(exporter))
+    tracer = provider.get_tracer("span-spool-check")
+    for index in range(batches):
+        with tracer.start_as_current_span(f"span-{index}"):
+            pass
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--batches", type=int, default=200)
+    args = parser.parse_args()
+
+    SpoolingSpanExporter._MIN_BACKOFF = 0.05
+    SpoolingSpanExporter._MAX_BACKOFF = 0.2
+    collector = StandInCollector()
+    failures = []
+
+    def check(condition: bool, message: str) -> None:
+        print(f"{'ok  ' if condition else 'FAIL'} {message}")
+        if not condition:
+            failures.append(message)
+
+    with tempfile.TemporaryDirectory() as spool_dir:
+        collector.paused.set()
+        exporter = SpoolingSpanExporter(collector.endpoint, spool_dir, segment_bytes=4096)
+        start = time.perf_counter()
+        export_batches(exporter, args.batches)
+        export_ms = (time.perf_counter() - start) * 1000
+        time.sleep(0.3)
+        stats = exporter.stats()
+        check(stats["spooled_batches"] == args.batches, f"{args.batches} batches spooled while paused ({export_ms:.1f} ms)")
+        check(collector.received == 0 and stats["failed_attempts"] > 0, "nothing delivered while collector returns 503")
+        check(not exporter.force_flush(200), "force_flush reports failure while batches are unsent")
+        exporter.shutdown()
+
+        restarted = SpoolingSpanExporter(collector.endpoint, spool_dir, segment_bytes=4096)
+        collector.paused.clear()
+        flushed = restarted.force_flush(10000)
+        check(flushed and restarted.stats()["spool_bytes"] == 0, "force_flush succeeds only with an empty spool")
+        check(collector.received == args.batches, f"all batches replayed after restart ({collector.received})")
+
+        for _ in range(20):
+            export_batches(restarted, 1)
+            check_flush = restarted.force_flush(5000)
+            if not check_flush or restarted.stats()["spool_bytes"]:
+                break
+        check(check_flush and restarted.stats()["spool_bytes"] == 0, "interleaved export/flush never leaves data behind")
+        restarted.shutdown()
+
+    with tempfile.TemporaryDirectory() as spool_dir:
+        first = SpoolingSpanExporter(collector.endpoint, spool_dir)
+        try:
+            SpoolingSpanExporter(collector.endpoint, spool_dir).shutdown()
+            locked = False
+        except SpoolLocked:
+            locked = True
+        check(locked, "a second exporter cannot open a spool directory in use")
+        first.shutdown()
+
+    with tempfile.TemporaryDirectory() as spool_dir:
+        collector.paused.clear()
+        compressed = SpoolingSpanExporter(
+            collector.endpoint, spool_dir, headers={"x-tenant": "tenant-a"}, compression=Compression.Gzip
+        )
+        export_batches(compressed, 1)
+        flushed = compressed.force_flush(5000)
+        spans = [
+            span.name
+            for resource_spans in collector.last_request.resource_spans
+            for scope_spans in resource_spans.scope_spans
+            for span in scope_spans.spans
+        ] if collector.last_request else []
+        check(
+            flushed and collector.last_headers.get("x-tenant") == "tenant-a" and spans == ["span-0"],
+            "OTLP headers and gzip compression reach the collector",
+        )
+        compressed.shutdown()
+
+    with tempfile.TemporaryDirectory() as spool_dir:
+        collector.paused.set()
+        bounded = SpoolingSpanExporter(collector.endpoint, spool_dir, max_bytes=2048, segment_bytes=512)
+        export_batches(bounded, 50)
+        stats = bounded.stats()
+        check(stats["dropped_batches"] > 0 and stats["spool_bytes"] <= 2048, f"full spool drops new batches ({stats})")
+        bounded.shutdown()
+
+    collector.server.shutdown()
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == "__main__":
+    main()
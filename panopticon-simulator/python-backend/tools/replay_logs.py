@@ -0,0 +1,335 @@
+"""Replay recorded request logs against a running backend.
+
+Reads the structured request logs emitted by ``log_requests`` (one JSON object
+per line) or Fluent Bit output (a JSON array or JSON lines whose records carry
+the original line in ``log``), reconstructs the request stream with its
+original inter-arrival timing, and reports replayed latency against the
+recorded ``duration_ms``. ``log_requests`` logs when a request finishes, so
+arrival times are reconstructed as ``timestamp - duration_ms``.
+
+Usage:
+    python -m tools.replay_logs logs.json --target http://localhost:3000 --speed 4
+
+Only methods listed in ``--methods`` (default ``GET``) are replayed because
+request bodies are not part of the logs. ``http_path`` carries no query
+string either, so ``GET /products?category=...`` replays as ``GET /products``.
+
+Logs are streamed rather than loaded: each file is expected in log order,
+arrival times are re-sorted within ``--reorder-window`` seconds (the longest
+request worth restoring the order of), and files are merged by time. A
+request only becomes a task once it is due and one of ``--concurrency``
+slots is free.
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import heapq
+import itertools
+import json
+import re
+import statistics
+import time
+from dataclasses import dataclass, field
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, Iterable, Iterator, List, Optional, TextIO
+
+import httpx
+
+_READ_CHUNK = 64 * 1024
+_ID_SEGMENT = re.compile(r"/[0-9a-fA-F]{8}-[0-9a-fA-F]{4}-[0-9a-fA-F]{4}-[0-9a-fA-F]{4}-[0-9a-fA-F]{12}(?=/|$)")
+
+
+@dataclass
+class RecordedRequest:
+    timestamp: float
+    method: str
+    path: str
+    status_code: Optional[int]
+    duration_ms: Optional[float]
+
+    @property
+    def route(self) -> str:
+        return f"{self.method} {_ID_SEGMENT.sub('/{id}', self.path)}"
+
+
+@dataclass
+class ReplayResult:
+    request: RecordedRequest
+    status_code: Optional[int]
+    duration_ms: float
+    lag_ms: float
+    error: Optional[str] = None
+
+
+@dataclass
+class RouteReport:
+    recorded: List[float] = field(default_factory=list)
+    replayed: List[float] = field(default_factory=list)
+    status_mismatches: int = 0
+    errors: int = 0
+
+
+def _parse_timestamp(value: Any) -> Optional[float]:
+    if isinstance(value, (int, float)):
+        return float(value)
+    if isinstance(value, str):
+        try:
+            return datetime.fromisoformat(value.replace("Z", "+00:00")).timestamp()
+        except ValueError:
+            return None
+    return None
+
+
+def _iter_array(handle: TextIO, buffer: str) -> Iterator[Any]:
+    """Yield the elements of a JSON array one at a time, reading ``handle`` in chunks."""
+    decoder = json.JSONDecoder()
+    buffer = buffer[1:]
+    eof = False
+    while True:
+        buffer = buffer.lstrip().lstrip(",").lstrip()
+        if buffer.startswith("]") or (eof and not buffer):
+            return
+        try:
+            element, end = decoder.raw_decode(buffer)
+        except json.JSONDecodeError:
+            if eof:
+                return  # Truncated array, e.g. a log file still being written.
+            chunk = handle.read(_READ_CHUNK)
+            eof = not chunk
+            buffer += chunk
+            continue
+        yield element
+        buffer = buffer[end:]
+
+
+def _iter_records(path: Path) -> Iterator[Dict[str, Any]]:
+    with path.open() as handle:
+        first = handle.readline()
+        if first.lstrip().startswith("["):
+            records = _iter_array(handle, first.lstrip())
+        else:
+            records = (
+                record
+                for line in itertools.chain([first], handle)
+                if line.strip()
+                for record in _loads(line)
+            )
+        yield from (record for record in records if isinstance(record, dict))
+
+
+def _loads(line: str) -> List[Any]:
+    try:
+        return [json.loads(line)]
+    except json.JSONDecodeError:
+        return []
+
+
+def _to_request(record: Dict[str, Any]) -> Optional[RecordedRequest]:
+    # Fluent Bit keeps the container line in ``log``; unparsed lines carry the JSON as a string.
+    if isinstance(record.get("log"), str):
+        try:
+            inner = json.loads(record["log"])
+        except json.JSONDecodeError:
+            inner = None
+        if isinstance(inner, dict):
+            record = {**record, **inner}
+
+    method = record.get("http_method") or record.get("method")
+    path = record.get("http_path") or record.get("path")
+    timestamp = _parse_timestamp(record.get("timestamp") or record.get("time") or record.get("date"))
+    if not method or not path or timestamp is None:
+        return None
+    status_code = record.get("http_status_code", record.get("statusCode"))
+    duration_ms = record.get("duration_ms", record.get("duration"))
+    if duration_ms is not None:
+        # The log line is written once the response is done; shift back to the arrival time.
+        timestamp -= float(duration_ms) / 1000
+    return RecordedRequest(
+        timestamp=timestamp,
+        method=str(method).upper(),
+        path=str(path),
+        status_code=int(status_code) if status_code is not None else None,
+        duration_ms=float(duration_ms) if duration_ms is not None else None,
+    )
+
+
+def _reorder(requests: Iterable[RecordedRequest], window: float) -> Iterator[RecordedRequest]:
+    """Sort a stream that is in order up to ``window`` seconds, holding only that window in memory.
+
+    Log lines are written in completion order, so arrival times (``timestamp -
+    duration_ms``) are out of order by up to the longest request duration.
+    """
+    pending: List[tuple] = []
+    newest = float("-inf")
+    for sequence, request in enumerate(requests):
+        heapq.heappush(pending, (request.timestamp, sequence, request))
+        newest = max(newest, request.timestamp)
+        while pending[0][0] < newest - window:
+            yield heapq.heappop(pending)[2]
+    while pending:
+        yield heapq.heappop(pending)[2]
+
+
+def load_requests(paths: List[Path], methods: List[str], window: float = 60.0) -> Iterator[RecordedRequest]:
+    streams = [
+        _reorder(
+            (request for request in map(_to_request, _iter_records(path)) if request and request.method in methods),
+            window,
+        )
+        for path in paths
+    ]
+    return heapq.merge(*streams, key=lambda request: request.timestamp)
+
+
+async def replay(
+    requests: Iterable[RecordedRequest],
+    target: str,
+    speed: float,
+    concurrency: int,
+    timeout: float,
+) -> List[ReplayResult]:
+    semaphore = asyncio.Semaphore(concurrency)
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+    results: List[ReplayResult] = []
+    in_flight = set()
+
+    async with httpx.AsyncClient(base_url=target, timeout=timeout, limits=limits) as client:
+
+        async def fire(request: RecordedRequest, lag_ms: float) -> None:
+            try:
+                sent = time.perf_counter()
+                try:
+                    response = await client.request(request.method, request.path)
+                    status_code, error = response.status_code, None
+                except httpx.HTTPError as exc:
+                    status_code, error = None, type(exc).__name__
+                duration_ms = (time.perf_counter() - sent) * 1000
+                results.append(ReplayResult(request, status_code, duration_ms, lag_ms, error))
+            finally:
+                semaphore.release()
+
+        origin = started = None
+        for request in requests:
+            if origin is None:
+                origin, started = request.timestamp, time.perf_counter()
+            due = (request.timestamp - origin) / speed
+            delay = due - (time.perf_counter() - started)
+            if delay > 0:
+                await asyncio.sleep(delay)
+            await semaphore.acquire()
+            lag_ms = max((time.perf_counter() - started - due) * 1000, 0.0)
+            task = asyncio.create_task(fire(request, lag_ms))
+            in_flight.add(task)
+            task.add_done_callback(in_flight.discard)
+        await asyncio.gather(*in_flight)
+    return results
+
+
+def _percentile(values: List[float], pct: float) -> Optional[float]:
+    if not values:
+        return None
+    if len(values) == 1:
+        return values[0]
+    return statistics.quantiles(values, n=100, method="inclusive")[int(pct) - 1]
+
+
+def _round(value: Optional[float]) -> Optional[float]:
+    return round(value, 2) if value is not None else None
+
+
+def _cell(value: Optional[float], sign: str = "") -> str:
+    return f"{value:>{sign}8.1f}" if value is not None else f"{'-':>8}"
+
+
+def build_report(results: List[ReplayResult]) -> Dict[str, Any]:
+    routes: Dict[str, RouteReport] = {}
+    for result in results:
+        report = routes.setdefault(result.request.route, RouteReport())
+        report.replayed.append(result.duration_ms)
+        if result.request.duration_ms is not None:
+            report.recorded.append(result.request.duration_ms)
+        if result.error:
+            report.errors += 1
+        elif result.request.status_code is not None and result.status_code != result.request.status_code:
+            report.status_mismatches += 1
+
+    summary = {}
+    for route, report in sorted(routes.items()):
+        entry = {"count": len(report.replayed), "errors": report.errors, "status_mismatches": report.status_mismatches}
+        for pct in (50, 95, 99):
+            recorded = _percentile(report.recorded, pct)
+            replayed = _percentile(report.replayed, pct)
+            entry[f"p{pct}"] = {
+                "recorded_ms": _round(recorded),
+                "replayed_ms": _round(replayed),
+                "delta_ms": _round(replayed - recorded) if recorded is not None and replayed is not None else None,
+            }
+        summary[route] = entry
+    return {
+        "requests": len(results),
+        "max_schedule_lag_ms": round(max((result.lag_ms for result in results), default=0.0), 2),
+        "routes": summary,
+    }
+
+
+def print_report(report: Dict[str, Any]) -> None:
+    print(f"replayed {report['requests']} requests (max schedule lag {report['max_schedule_lag_ms']} ms)")
+    header = f"{'route':<40} {'count':>6} {'err':>4} {'diff':>4} " + " ".join(
+        f"{f'p{pct} rec/rep/delta':>26}" for pct in (50, 95, 99)
+    )
+    print(header)
+    for route, entry in report["routes"].items():
+        cells = " ".join(
+            "/".join(
+                (
+                    _cell(entry[f"p{pct}"]["recorded_ms"]),
+                    _cell(entry[f"p{pct}"]["replayed_ms"]),
+                    _cell(entry[f"p{pct}"]["delta_ms"], "+"),
+                )
+            )
+            for pct in (50, 95, 99)
+        )
+        print(f"{route:<40} {entry['count']:>6} {entry['errors']:>4} {entry['status_mismatches']:>4} {cells}")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Replay recorded request logs against a running backend.")
+    parser.add_argument("logs", nargs="+", type=Path, help="log files (JSON lines or Fluent Bit JSON)")
+    parser.add_argument("--target", default="http://localhost:3000", help="backend base URL")
+    parser.add_argument("--speed", type=float, default=1.0, help="speed-up factor for inter-arrival times")
+    parser.add_argument("--concurrency", type=int, default=50, help="maximum in-flight requests")
+    parser.add_argument("--methods", default="GET", help="comma separated HTTP methods to replay")
+    parser.add_argument("--limit", type=int, default=None, help="replay at most this many requests")
+    parser.add_argument("--timeout", type=float, default=30.0, help="per-request timeout in seconds")
+    parser.add_argument(
+        "--reorder-window",
+        type=float,
+        default=60.0,
+        help="seconds of log kept in memory to restore arrival order within a file",
+    )
+    parser.add_argument("--json", action="store_true", help="print the report as JSON")
+    args = parser.parse_args()
+    if args.speed <= 0:
+        parser.error("--speed must be greater than 0")
+    if args.concurrency <= 0:
+        parser.error("--concurrency must be greater than 0")
+
+    if args.reorder_window < 0:
+        parser.error("--reorder-window must not be negative")
+
+    methods = [method.strip().upper() for method in args.methods.split(",") if method.strip()]
+    requests = itertools.islice(load_requests(args.logs, methods, args.reorder_window), args.limit)
+    results = asyncio.run(replay(requests, args.target, args.speed, args.concurrency, args.timeout))
+    if not results:
+        parser.error("no replayable requests found in the given logs")
+    report = build_report(results)
+    if args.json:
+        print(json.dumps(report, indent=2, allow_nan=False))
+    else:
+        print_report(report)
+
+
+if __name__ == "__main__":
+    main()